@@ -12,6 +12,18 @@ python manage.py migrate
 python manage.py migrate account
 python manage.py migrate pregnancy
 
+# Refresh the full-text search index over milestones and resources
+echo "Rebuilding search index..."
+python manage.py rebuild_search_index
+
+# Per-language milestone content, loaded once per worker
+echo "Compiling milestone catalog..."
+python manage.py compile_milestone_catalog
+
+# Bundle and minify app JS/CSS, then collect (hashes + gzip/Brotli)
+echo "Building static bundles..."
+python manage.py build_assets
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
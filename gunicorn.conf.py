@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration for Linda Mama.
+
+Gunicorn picks this file up automatically from the working directory. It
+prepares a shared directory for Prometheus samples so ``/metrics`` reports
+totals across all worker processes rather than whichever worker answered
+the scrape.
+"""
+
+import os
+import shutil
+import tempfile
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'lindamama-prometheus'),
+)
+
+
+def on_starting(server):
+    """Clear samples left behind by a previous master process."""
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauges owned by a worker that has exited."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """
+    Write out buffered audit events, then close the worker's database pools
+    so the server sees clean disconnects.
+    """
+    from pregnancy import audit
+    audit.shutdown()
+
+    from django.db import connections
+    for connection in connections.all(initialized_only=True):
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
@@ -1,15 +1,136 @@
+import json
+import re
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, UserProfile
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import (
+    Appointment, HealthMetric, PregnancyMilestone, PregnancyMilestoneTranslation, Resource, User, UserProfile,
+    normalize_phone,
+)
+
+PHONE_SEARCH_RE = re.compile(r'^\+?[\d\s\-\(\)]+$')
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    On PostgreSQL, take the changelist count from the planner's row
+    estimate instead of COUNT(*) once it is past ``exact_below``; smaller
+    results and other databases are counted exactly.
+    """
+    exact_below = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == 'postgresql':
+            sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+            if estimate >= self.exact_below:
+                return estimate
+        return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows: estimated counts,
+    no second unfiltered COUNT(*), and prefix search on indexed, normalized
+    columns in place of ``icontains`` across joins.
+
+    ``prefix_search`` maps ``'username'``, ``'email'`` and ``'phone'`` to the
+    lookup path searched for that kind of term. A term that looks like a
+    phone number only searches phones, one with ``@`` only emails, and
+    anything else usernames and emails. Every match is on the start of the
+    value and ignores case, matched through UPPER(username) and UPPER(email)
+    pattern indexes on PostgreSQL (migrations 0015 and 0016).
 
-class CustomUserAdmin(UserAdmin):
+    First and last names are not searched; an unanchored name search has
+    no index to use. Find people by username, email or phone instead.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    prefix_search = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not self.prefix_search:
+            return queryset, False
+        lookups = self.prefix_search
+        if 'phone' in lookups and PHONE_SEARCH_RE.match(term) and normalize_phone(term):
+            condition = Q(**{f"{lookups['phone']}__startswith": normalize_phone(term)})
+        else:
+            condition = Q()
+            if 'email' in lookups:
+                # Not every path lower-cases emails (create_user, older rows)
+                condition |= Q(**{f"{lookups['email']}__istartswith": term})
+            if 'username' in lookups and '@' not in term:
+                condition |= Q(**{f"{lookups['username']}__istartswith": term})
+            if not condition:
+                return queryset.none(), False
+        return queryset.filter(condition), False
+
+
+class CustomUserAdmin(ScalableAdmin, UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff')
     list_filter = ('is_staff', 'is_superuser', 'is_active')
-    search_fields = ('username', 'email', 'first_name', 'last_name')
+    search_fields = ('username', 'email')
+    search_help_text = 'Start of a username or email address, any case (names are not searched)'
+    prefix_search = {'username': 'username', 'email': 'email'}
+
+class UserProfileAdmin(ScalableAdmin):
+    list_display = ('user', 'role', 'phone_number', 'blood_type', 'facility', 'created_at')
+    list_filter = ('role',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('user__username', 'user__email', 'phone_normalized')
+    search_help_text = 'Start of a username, email address or phone number'
+    prefix_search = {'username': 'user__username', 'email': 'user__email', 'phone': 'phone_normalized'}
+
+class AppointmentAdmin(ScalableAdmin):
+    list_display = ('date_time', 'user', 'appointment_type', 'healthcare_provider', 'status')
+    list_filter = ('status', 'appointment_type')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('user__username', 'user__email')
+    search_help_text = "Start of the patient's username or email address"
+    prefix_search = {'username': 'user__username', 'email': 'user__email'}
+
+class HealthMetricAdmin(ScalableAdmin):
+    list_display = ('date', 'user', 'weight', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'fetal_heart_rate')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    # Newest first by primary key; there is no index on date alone
+    ordering = ('-id',)
+    search_fields = ('user__username', 'user__email')
+    search_help_text = "Start of the patient's username or email address"
+    prefix_search = {'username': 'user__username', 'email': 'user__email'}
+
+class PregnancyMilestoneTranslationInline(admin.StackedInline):
+    model = PregnancyMilestoneTranslation
+    extra = 0
+
+class PregnancyMilestoneAdmin(admin.ModelAdmin):
+    list_display = ('week', 'title', 'baby_size')
+    inlines = [PregnancyMilestoneTranslationInline]
 
-class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'phone_number', 'blood_type', 'created_at')
-    search_fields = ('user__username', 'user__email', 'phone_number')
+class ResourceAdmin(admin.ModelAdmin):
+    list_display = ('title', 'content_type', 'stage', 'language', 'updated_at')
+    list_filter = ('content_type', 'stage', 'language')
+    search_fields = ('title',)
 
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(UserProfile, UserProfileAdmin)
+admin.site.register(Appointment, AppointmentAdmin)
+admin.site.register(HealthMetric, HealthMetricAdmin)
+admin.site.register(PregnancyMilestone, PregnancyMilestoneAdmin)
+admin.site.register(Resource, ResourceAdmin)
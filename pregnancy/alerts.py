@@ -0,0 +1,179 @@
+"""
+Live clinician alerts over server-sent events.
+
+Every open ``alerts/stream/`` connection is an async generator on the
+server's event loop, so idle clinicians cost a queue and a coroutine, not a
+thread. ``publish()`` fans new risk flags out to the streams in this
+process. Each stream also queries the database on connect and after every
+``HEARTBEAT_SECONDS`` heartbeat, which covers flags raised by other worker
+processes or by ``manage.py score_risk``.
+
+Ids are not committed in order, so a stream does not trust a single
+high-water mark. It remembers which ids it has sent, and each catch-up
+re-reads everything above a floor that trails by ``LATE_COMMIT_SECONDS``.
+A flag whose transaction commits after a higher id was streamed is still
+delivered. Flag ids double as SSE event ids, so a reconnecting
+``EventSource`` replays what it missed via ``Last-Event-ID``.
+
+A stream holds no database connection while it waits: the request's own
+connection is released before the first event, and each catch-up page runs
+on a worker thread that closes its connection afterwards, as
+``run_concurrently`` does.
+"""
+
+import asyncio
+import json
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.urls import reverse
+
+from .async_utils import _in_worker
+from .models import RiskFlag
+
+HEARTBEAT_SECONDS = 15
+REPLAY_LIMIT = 200
+QUEUE_SIZE = 100
+RETRY_MS = 5000
+# How long a flag's transaction may stay open after a higher id was committed
+LATE_COMMIT_SECONDS = 120
+
+_subscribers = set()
+
+
+class Subscription:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            # A stalled client; the catch-up after the next heartbeat fills the gap
+            pass
+
+
+def subscribe():
+    subscription = Subscription()
+    _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    _subscribers.discard(subscription)
+
+
+def publish(alerts):
+    """Hand serialized alerts to every stream in this process. Safe from any thread."""
+    for subscription in list(_subscribers):
+        for alert in alerts:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, alert)
+            except RuntimeError:
+                # Event loop already closed
+                unsubscribe(subscription)
+
+
+def publish_flags(flags):
+    """Serialize freshly stored flags and publish them; call once the transaction commits."""
+    flags = RiskFlag.objects.filter(pk__in=[flag.pk for flag in flags]).select_related('user__userprofile').order_by('id')
+    publish([serialize(flag) for flag in flags])
+
+
+def serialize(flag):
+    return {
+        'id': flag.id,
+        'patient_id': flag.user.userprofile.id,
+        'patient': flag.user.get_full_name(),
+        'rule': flag.rule,
+        'title': flag.get_rule_display(),
+        'severity': flag.get_severity_display().lower(),
+        'value': flag.value,
+        'observed_on': flag.observed_on.isoformat(),
+        'created_at': flag.created_at.isoformat(),
+        'url': reverse('clinician_patient_detail', args=[flag.user.userprofile.id]),
+    }
+
+
+def flags_after(last_id, limit=REPLAY_LIMIT):
+    return RiskFlag.objects.filter(id__gt=last_id).select_related('user__userprofile').order_by('id')[:limit]
+
+
+async def latest_id():
+    flag = await RiskFlag.objects.order_by('-id').only('id').afirst()
+    return flag.id if flag else 0
+
+
+def format_event(alert):
+    return f"id: {alert['id']}\nevent: alert\ndata: {json.dumps(alert)}\n\n"
+
+
+class _Delivered:
+    """
+    Ids a stream has sent above its floor. The floor only moves up to the
+    highest id seen at a catch-up ``LATE_COMMIT_SECONDS`` ago, and the set is
+    pruned to ids above it, so both it and the catch-up query stay small.
+    """
+
+    def __init__(self, floor):
+        self.floor = floor
+        self.ids = set()
+        self.marks = deque()
+
+    def __contains__(self, flag_id):
+        return flag_id <= self.floor or flag_id in self.ids
+
+    def add(self, flag_id):
+        self.ids.add(flag_id)
+
+    def caught_up(self, now):
+        self.marks.append((now, max(self.ids, default=self.floor)))
+        while self.marks and now - self.marks[0][0] >= LATE_COMMIT_SECONDS:
+            self.floor = max(self.floor, self.marks.popleft()[1])
+        self.ids = {flag_id for flag_id in self.ids if flag_id > self.floor}
+
+
+async def _catch_up(delivered):
+    """Flags above the floor that this stream has not sent, page by page."""
+    after = delivered.floor
+    while True:
+        query = _in_worker(lambda: [serialize(flag) for flag in flags_after(after)])
+        page = await sync_to_async(query, thread_sensitive=False)()
+        for alert in page:
+            if alert['id'] not in delivered:
+                yield alert
+        if len(page) < REPLAY_LIMIT:
+            return
+        after = page[-1]['id']
+
+
+async def event_stream(last_id):
+    """Replay flags after ``last_id``, then stream new ones until the client disconnects."""
+    subscription = subscribe()
+    loop = asyncio.get_running_loop()
+    delivered = _Delivered(last_id)
+    try:
+        # Hand back the connection the request thread used for auth and the profile
+        await sync_to_async(connections.close_all)()
+        yield f'retry: {RETRY_MS}\n\n'
+        catch_up_at = loop.time()
+        while True:
+            # The database is only read on connect and once per heartbeat
+            if loop.time() >= catch_up_at:
+                async for alert in _catch_up(delivered):
+                    delivered.add(alert['id'])
+                    yield format_event(alert)
+                delivered.caught_up(loop.time())
+                catch_up_at = loop.time() + HEARTBEAT_SECONDS
+            try:
+                alert = await asyncio.wait_for(subscription.queue.get(), timeout=catch_up_at - loop.time())
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if alert['id'] not in delivered:
+                delivered.add(alert['id'])
+                yield format_event(alert)
+    finally:
+        unsubscribe(subscription)
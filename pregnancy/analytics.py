@@ -0,0 +1,233 @@
+"""
+Population cohort analytics for program managers.
+
+Columns are streamed from a (server-side, where supported) cursor in
+fixed-size chunks straight into NumPy arrays, so no model instances are
+built and memory stays proportional to rows times a few bytes per column.
+All aggregation is vectorized: region and trimester breakdowns are
+``np.bincount`` over small integer codes, and per-reading region lookups
+use ``np.searchsorted`` against the sorted patient ids.
+
+``cohort_report()`` is cached for the rest of the day.
+"""
+
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from . import gestation
+from .models import Appointment, HealthMetric, UserProfile
+
+CHUNK_SIZE = 50_000
+CACHE_KEY = 'analytics:cohort:{day}'
+UNKNOWN_REGION = 'Unknown'
+
+TRIMESTERS = ('first', 'second', 'third', 'post_term', 'unknown')
+BP_BANDS = ('normal', 'elevated', 'stage_1', 'stage_2', 'severe')
+# Upper bounds (exclusive) of each band except the last, on the worse of the
+# two readings: systolic <120, <130, <140, <160 / diastolic <80, <80, <90, <110
+SYSTOLIC_EDGES = np.array([120, 130, 140, 160])
+DIASTOLIC_EDGES = np.array([80, 80, 90, 110])
+BP_WINDOW_DAYS = 90
+ADHERENCE_WINDOW_DAYS = 365
+
+
+def extract_columns(queryset, dtypes):
+    """
+    Stream the ``dtypes`` columns of ``queryset`` into one array per column.
+
+    ``datetime64[D]`` parses ISO date strings (SQLite) and ``date`` objects
+    (PostgreSQL) alike, with NULL as NaT; ``object`` keeps raw values.
+    """
+    fields = list(dtypes)
+    sql, params = queryset.values_list(*fields).query.get_compiler(using=queryset.db).as_sql()
+    chunks = {field: [] for field in fields}
+    with connections[queryset.db].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(CHUNK_SIZE):
+            for field, column in zip(fields, zip(*rows)):
+                chunks[field].append(np.array(column, dtype=dtypes[field]))
+    return {
+        field: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[field])
+        for field, parts in chunks.items()
+    }
+
+
+class RegionCodes:
+    """Maps free-text region names to small integer codes for bincount."""
+
+    def __init__(self):
+        self.names = []
+        self.codes = {}
+
+    def code(self, name):
+        name = (name or '').strip().title() or UNKNOWN_REGION
+        if name not in self.codes:
+            self.codes[name] = len(self.names)
+            self.names.append(name)
+        return self.codes[name]
+
+    def encode(self, values):
+        """Vectorized ``code`` over an object array of raw names."""
+        values = np.array([value or '' for value in values], dtype=str)
+        distinct, inverse = np.unique(values, return_inverse=True)
+        return np.array([self.code(name) for name in distinct], dtype=np.int64)[inverse].reshape(-1)
+
+
+def _share(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def _by_region(values, regions, present):
+    return {
+        name: None if np.isnan(values[code]) else round(float(values[code]), 4)
+        for code, name in enumerate(regions.names) if present[code]
+    }
+
+
+def load_patients(regions):
+    columns = extract_columns(
+        UserProfile.objects.filter(role=UserProfile.Roles.PATIENT).order_by('user_id'),
+        {
+            'user_id': np.int64,
+            'region': object,
+            'last_menstrual_period': 'datetime64[D]',
+            'due_date': 'datetime64[D]',
+            'has_high_risk': np.bool_,
+        },
+    )
+    columns['region'] = regions.encode(columns['region'])
+    return columns
+
+
+def trimester_codes(days):
+    """Index into TRIMESTERS for each ``gestation.gestational_days()`` value."""
+    weeks = days // 7 + 1
+    codes = np.where(weeks > gestation.MAX_WEEK, TRIMESTERS.index('post_term'), gestation.trimesters(weeks) - 1)
+    return np.where(days < 0, TRIMESTERS.index('unknown'), codes)
+
+
+def region_of(user_ids, patient_ids, patient_regions, unknown_code):
+    """Look up each user's region code; users who are not patients get ``unknown_code``."""
+    if not len(patient_ids):
+        return np.full(len(user_ids), unknown_code, dtype=np.int64)
+    position = np.clip(np.searchsorted(patient_ids, user_ids), 0, len(patient_ids) - 1)
+    return np.where(patient_ids[position] == user_ids, patient_regions[position], unknown_code)
+
+
+def bp_report(patients, regions, today):
+    since = today - timedelta(days=BP_WINDOW_DAYS)
+    readings = extract_columns(
+        HealthMetric.objects.filter(
+            date__gte=since,
+            blood_pressure_systolic__isnull=False,
+            blood_pressure_diastolic__isnull=False,
+        ).order_by(),
+        {
+            'user_id': np.int64,
+            'blood_pressure_systolic': np.int16,
+            'blood_pressure_diastolic': np.int16,
+        },
+    )
+    systolic = readings['blood_pressure_systolic']
+    diastolic = readings['blood_pressure_diastolic']
+    bands = np.maximum(np.digitize(systolic, SYSTOLIC_EDGES), np.digitize(diastolic, DIASTOLIC_EDGES))
+    unknown = regions.code(UNKNOWN_REGION)
+    region = region_of(readings['user_id'], patients['user_id'], patients['region'], unknown)
+
+    n_regions = len(regions.names)
+    matrix = np.bincount(region * len(BP_BANDS) + bands, minlength=n_regions * len(BP_BANDS))
+    matrix = matrix.reshape(n_regions, len(BP_BANDS))
+    return {
+        'window_days': BP_WINDOW_DAYS,
+        'readings': int(len(systolic)),
+        'percentiles': {
+            'systolic': dict(zip(('p10', 'p50', 'p90'), np.percentile(systolic, [10, 50, 90]).round(1).tolist()))
+            if len(systolic) else None,
+            'diastolic': dict(zip(('p10', 'p50', 'p90'), np.percentile(diastolic, [10, 50, 90]).round(1).tolist()))
+            if len(diastolic) else None,
+        },
+        'bands': dict(zip(BP_BANDS, matrix.sum(axis=0).tolist())),
+        'bands_by_region': {
+            name: dict(zip(BP_BANDS, matrix[code].tolist()))
+            for code, name in enumerate(regions.names) if matrix[code].any()
+        },
+    }
+
+
+def adherence_report(patients, regions, now):
+    """Share of past, non-cancelled appointments that were attended, by region."""
+    appointments = extract_columns(
+        Appointment.objects.filter(
+            date_time__lt=now,
+            date_time__gte=now - timedelta(days=ADHERENCE_WINDOW_DAYS),
+        ).exclude(status='cancelled').annotate(
+            attended=Case(
+                When(Q(status='completed') | Q(is_completed=True), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        ).order_by(),
+        {'user_id': np.int64, 'attended': np.int8},
+    )
+    unknown = regions.code(UNKNOWN_REGION)
+    region = region_of(appointments['user_id'], patients['user_id'], patients['region'], unknown)
+
+    n_regions = len(regions.names)
+    due = np.bincount(region, minlength=n_regions)
+    kept = np.bincount(region, weights=appointments['attended'], minlength=n_regions)
+    return {
+        'window_days': ADHERENCE_WINDOW_DAYS,
+        'appointments': int(due.sum()),
+        'overall': round(float(kept.sum() / due.sum()), 4) if due.sum() else None,
+        'by_region': _by_region(_share(kept, due), regions, due),
+    }
+
+
+def build_cohort_report(now=None):
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    regions = RegionCodes()
+    patients = load_patients(regions)
+    regions.code(UNKNOWN_REGION)
+    n_regions = len(regions.names)
+
+    trimesters = trimester_codes(gestation.gestational_days(patients['last_menstrual_period'], patients['due_date'], today))
+    by_region = np.bincount(patients['region'], minlength=n_regions)
+    high_risk = np.bincount(patients['region'], weights=patients['has_high_risk'], minlength=n_regions)
+    tri_matrix = np.bincount(
+        patients['region'] * len(TRIMESTERS) + trimesters, minlength=n_regions * len(TRIMESTERS),
+    ).reshape(n_regions, len(TRIMESTERS))
+
+    return {
+        'date': today.isoformat(),
+        'generated_at': timezone.now().isoformat(),
+        'patients': int(len(patients['user_id'])),
+        'patients_by_region': {name: int(by_region[code]) for code, name in enumerate(regions.names) if by_region[code]},
+        'trimesters': dict(zip(TRIMESTERS, tri_matrix.sum(axis=0).tolist())),
+        'trimesters_by_region': {
+            name: dict(zip(TRIMESTERS, tri_matrix[code].tolist()))
+            for code, name in enumerate(regions.names) if by_region[code]
+        },
+        'high_risk_share': round(float(patients['has_high_risk'].mean()), 4) if len(patients['user_id']) else None,
+        'high_risk_share_by_region': _by_region(_share(high_risk, by_region), regions, by_region),
+        'blood_pressure': bp_report(patients, regions, today),
+        'appointment_adherence': adherence_report(patients, regions, now),
+    }
+
+
+def cohort_report(refresh=False):
+    """Today's report, computed at most once per day unless ``refresh``."""
+    today = timezone.localdate()
+    key = CACHE_KEY.format(day=today.isoformat())
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = build_cohort_report()
+        tomorrow = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+        cache.set(key, report, timeout=max(int((tomorrow - timezone.now()).total_seconds()), 60))
+    return report
@@ -0,0 +1,89 @@
+"""
+Appointment list queries for the patient appointments page.
+
+``sections()`` returns one page of upcoming appointments (soonest first)
+and one of past appointments (latest first) from a single ``UNION ALL``
+statement. Each half is a range scan on the ``(user, date_time)`` index,
+limited to ``page_size + 1`` rows, so a patient with years of visits only
+reads the rows on screen. Both halves are keyset-paginated on
+(date_time, id) with their own cursor; the union does not guarantee row
+order, so each half is re-sorted after the split. ``status_counts()``
+gets every per-status total from one aggregate.
+"""
+
+from datetime import datetime
+
+from django.db.models import Count, Q, Value
+from django.utils import timezone
+
+from .models import Appointment
+
+PAGE_SIZE = 10
+UPCOMING, PAST = 'upcoming', 'past'
+
+
+def encode_cursor(appointment):
+    return f'{appointment.date_time.isoformat()}|{appointment.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, pk = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _page(rows, page_size):
+    return rows[:page_size], encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+
+
+def sections(user, status=None, upcoming_cursor=None, past_cursor=None, page_size=PAGE_SIZE, now=None):
+    """
+    ``{'upcoming': (page, next_cursor), 'past': (page, next_cursor)}``;
+    a cursor is ``None`` on a section's last page.
+    """
+    now = now or timezone.now()
+    appointments = Appointment.objects.filter(user=user)
+    if status:
+        appointments = appointments.filter(status=status)
+
+    upcoming = appointments.filter(date_time__gte=now)
+    position = decode_cursor(upcoming_cursor) if upcoming_cursor else None
+    if position:
+        upcoming = upcoming.filter(Q(date_time__gt=position[0]) | Q(date_time=position[0], id__gt=position[1]))
+    upcoming = upcoming.annotate(section=Value(UPCOMING)).order_by('date_time', 'id')[:page_size + 1]
+
+    past = appointments.filter(date_time__lt=now)
+    position = decode_cursor(past_cursor) if past_cursor else None
+    if position:
+        past = past.filter(Q(date_time__lt=position[0]) | Q(date_time=position[0], id__lt=position[1]))
+    past = past.annotate(section=Value(PAST)).order_by('-date_time', '-id')[:page_size + 1]
+
+    rows = {UPCOMING: [], PAST: []}
+    for appointment in _union_all(upcoming, past):
+        rows[appointment.section].append(appointment)
+    # UNION ALL does not promise to keep each subquery's order
+    rows[UPCOMING].sort(key=lambda appointment: (appointment.date_time, appointment.pk))
+    rows[PAST].sort(key=lambda appointment: (appointment.date_time, appointment.pk), reverse=True)
+    return {section: _page(found, page_size) for section, found in rows.items()}
+
+
+def _union_all(*querysets):
+    # Each sliced, ordered query is wrapped as a subquery; the ORM's own
+    # union() refuses that on SQLite
+    db = querysets[0].db
+    parts, params = [], []
+    for number, queryset in enumerate(querysets):
+        sql, query_params = queryset.query.get_compiler(using=db).as_sql()
+        parts.append(f'SELECT * FROM ({sql}) AS section_{number}')
+        params.extend(query_params)
+    return Appointment.objects.db_manager(db).raw(' UNION ALL '.join(parts), params)
+
+
+def status_counts(user):
+    """``{status: count}`` for every status plus ``'all'``, in one aggregate."""
+    return Appointment.objects.filter(user=user).aggregate(
+        all=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status, _ in Appointment.STATUS_CHOICES},
+    )
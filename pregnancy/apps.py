@@ -13,6 +13,8 @@ class PregnancyConfig(AppConfig):
         Import signals when the app is ready.
         This method is called once Django starts.
         """
+        from . import checks  # noqa: F401 - registers the system checks
+
         # Import signals to ensure they are registered
         try:
             # Import signals module but don't trigger model imports
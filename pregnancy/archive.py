@@ -0,0 +1,101 @@
+"""
+Archive tier for health metrics and appointments.
+
+Live tables keep the current pregnancy and recent appointments, so the
+per-user queries behind dashboards and lists only walk hot rows. Rows are
+moved in primary-key batches to ``health_metric_archive`` and
+``appointment_archive`` (same columns, same ids) by ``manage.py
+archive_records``; ``health_metric_history`` / ``appointment_history``
+page through the archive on its ``(user, date)`` indexes when earlier
+history is asked for.
+
+What is archived:
+  * health metrics dated before the user's current last menstrual period
+    (an earlier pregnancy), or of users whose due date is more than
+    ``ARCHIVE_POSTPARTUM_DAYS`` in the past;
+  * appointments that ended more than ``ARCHIVE_APPOINTMENTS_AFTER_DAYS``
+    ago and are completed, cancelled or no-shows.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Appointment, ArchivedAppointment, ArchivedHealthMetric, HealthMetric
+
+DEFAULT_BATCH_SIZE = 1000
+HISTORY_PAGE_SIZE = 20
+
+
+def archivable_health_metrics(today=None):
+    today = today or timezone.localdate()
+    postpartum_cutoff = today - timedelta(days=settings.ARCHIVE_POSTPARTUM_DAYS)
+    return HealthMetric.objects.filter(
+        Q(date__lt=F('user__userprofile__last_menstrual_period'))
+        | Q(user__userprofile__due_date__lt=postpartum_cutoff)
+    )
+
+
+def archivable_appointments(now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=settings.ARCHIVE_APPOINTMENTS_AFTER_DAYS)
+    return Appointment.objects.filter(
+        Q(status__in=Appointment.FINAL_STATUSES) | Q(is_completed=True),
+        date_time__lt=cutoff,
+    )
+
+
+def move_batch(queryset, archive_model, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Copy up to ``batch_size`` rows of ``queryset`` into ``archive_model`` and
+    delete them from the live table in one transaction. Returns the number
+    of rows moved; 0 means nothing is left to archive.
+    """
+    model = queryset.model
+    columns = [field.attname for field in model._meta.concrete_fields]
+    with transaction.atomic():
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        rows = model.objects.filter(pk__in=ids).select_for_update().values_list(*columns)
+        archive_model.objects.bulk_create(
+            [archive_model(**dict(zip(columns, row))) for row in rows],
+            ignore_conflicts=True,  # a re-run after a crash between copy and delete
+        )
+        model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def _history_page(queryset, field, cursor, page_size):
+    position = _decode_history_cursor(cursor, queryset.model._meta.get_field(field))
+    if position:
+        queryset = queryset.filter(Q(**{f'{field}__lt': position[0]}) | Q(**{field: position[0], 'id__lt': position[1]}))
+    rows = list(queryset.order_by(f'-{field}', '-id')[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    last = rows[page_size - 1]
+    return rows[:page_size], f'{getattr(last, field).isoformat()}|{last.pk}'
+
+
+def _decode_history_cursor(cursor, field):
+    try:
+        value, pk = cursor.rsplit('|', 1)
+        return field.to_python(value), int(pk)
+    except (AttributeError, ValueError, ValidationError):
+        return None
+
+
+def health_metric_history(user, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    One page of a user's archived metrics, newest first, and the cursor of
+    the next page (``None`` on the last). Live metrics are listed separately.
+    """
+    return _history_page(ArchivedHealthMetric.objects.filter(user=user), 'date', cursor, page_size)
+
+
+def appointment_history(user, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """One page of a user's archived appointments, newest first, and the next cursor."""
+    return _history_page(ArchivedAppointment.objects.filter(user=user), 'date_time', cursor, page_size)
@@ -0,0 +1,56 @@
+"""
+Helpers for async views that need several independent queries.
+
+Django's async queryset methods (``aget``, ``acount``, async iteration)
+all run on one thread-sensitive executor, so ``asyncio.gather`` over them
+still executes the queries one after another. ``run_concurrently`` instead
+runs each query on its own worker thread with its own database connection,
+so a page costs roughly as much as its slowest query.
+
+With connection pooling on, the request thread already holds one pooled
+connection, so at most ``max_size - 1`` queries run at once; the rest wait
+for a free slot instead of timing out on an exhausted pool.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def _parallelism():
+    pool = settings.DATABASES['default'].get('OPTIONS', {}).get('pool')
+    if not isinstance(pool, dict):
+        return None  # no pool: every worker thread opens its own connection
+    return max(1, pool.get('max_size', 4) - 1)
+
+
+def _in_worker(query):
+    def run():
+        try:
+            return query()
+        finally:
+            # Honour CONN_MAX_AGE / health checks for this worker thread's connection.
+            close_old_connections()
+    return run
+
+
+async def run_concurrently(**queries):
+    """
+    Evaluate independent queries in parallel.
+
+    Each keyword argument is a zero-argument callable that returns fully
+    evaluated data (a list, a count, a model instance). Returns a dict with
+    the same keys.
+    """
+    names = list(queries)
+    limit = _parallelism()
+    slots = asyncio.Semaphore(limit or len(names) or 1)
+
+    async def run(name):
+        async with slots:
+            return await sync_to_async(_in_worker(queries[name]), thread_sensitive=False)()
+
+    results = await asyncio.gather(*(run(name) for name in names))
+    return dict(zip(names, results))
@@ -0,0 +1,155 @@
+"""
+Audit trail of clinician access to patient records.
+
+``record_access()`` only appends a ``RecordAccessEvent`` to an in-memory
+buffer, so auditing adds no query to the request. A writer thread per
+process saves the buffer with one ``bulk_create`` every
+``AUDIT_FLUSH_SECONDS``, or sooner once ``AUDIT_BUFFER_SIZE`` events are
+waiting, and closes its connection after each write so an idle writer
+holds none.
+
+On graceful shutdown the buffer is written out: ``shutdown()`` runs at
+interpreter exit and from gunicorn's ``worker_exit`` hook. If the database
+is unavailable, events are kept and retried on the next flush, up to
+``MAX_PENDING_BATCHES`` buffers' worth; beyond that the oldest are dropped
+and the loss is logged.
+
+Queries by patient or by clinician over a time range use the
+``(patient_id, occurred_at)`` and ``(clinician_id, occurred_at)`` indexes.
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .logging_handlers import get_request_id
+from .models import RecordAccessEvent
+from .ratelimit import client_ip
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_BATCHES = 50
+
+VIEW = RecordAccessEvent.Action.VIEW
+EXPORT = RecordAccessEvent.Action.EXPORT
+
+
+class _AuditWriter:
+    """The per-process buffer and the thread that writes it."""
+
+    def __init__(self, buffer_size, flush_seconds):
+        self.buffer_size = buffer_size
+        self.flush_seconds = flush_seconds
+        self.events = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = False
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self.thread.start()
+
+    def add(self, event):
+        with self.lock:
+            self.events.append(event)
+            full = len(self.events) >= self.buffer_size
+        if full:
+            self.wake.set()
+
+    def flush(self):
+        with self.lock:
+            events, self.events = self.events, []
+        if not events:
+            return 0
+        try:
+            RecordAccessEvent.objects.bulk_create(events, batch_size=self.buffer_size)
+        except Exception:
+            logger.exception(f'Could not write {len(events)} record access events; will retry')
+            with self.lock:
+                self.events[:0] = events
+                overflow = len(self.events) - self.buffer_size * MAX_PENDING_BATCHES
+                if overflow > 0:
+                    del self.events[:overflow]
+                    logger.error(f'Audit buffer full, dropped {overflow} record access events')
+            return 0
+        return len(events)
+
+    def _run(self):
+        while True:
+            self.wake.wait(self.flush_seconds)
+            self.wake.clear()
+            try:
+                self.flush()
+            finally:
+                # Also drops a broken connection, so the retry gets a fresh one
+                connections.close_all()
+            if self.stopping:
+                return
+
+    def stop(self, timeout=10):
+        # The final write happens on the writer thread, which has its own
+        # connection and is never inside an event loop.
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    # Re-create after fork: the parent's thread does not exist in the child.
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = _AuditWriter(settings.AUDIT_BUFFER_SIZE, settings.AUDIT_FLUSH_SECONDS)
+    return _writer
+
+
+def record_access(request, clinician, patient_user_id, action=VIEW):
+    """Buffer one access by ``clinician`` to the record of user ``patient_user_id``."""
+    _get_writer().add(RecordAccessEvent(
+        clinician_id=clinician.pk,
+        patient_id=patient_user_id,
+        action=action,
+        occurred_at=timezone.now(),
+        path=request.path[:200],
+        ip_address=client_ip(request) or None,
+        request_id=get_request_id()[:64],
+    ))
+
+
+def shutdown():
+    """Write out whatever this process still holds. Safe to call more than once."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.pid == os.getpid() and writer.thread.is_alive():
+        writer.stop()
+
+
+atexit.register(shutdown)
+
+
+def patient_accesses(patient_user_id, start=None, end=None):
+    """Accesses to one patient's record, newest first, optionally within [start, end)."""
+    return _in_range(RecordAccessEvent.objects.filter(patient_id=patient_user_id), start, end)
+
+
+def clinician_accesses(clinician_user_id, start=None, end=None):
+    """Records one clinician accessed, newest first, optionally within [start, end)."""
+    return _in_range(RecordAccessEvent.objects.filter(clinician_id=clinician_user_id), start, end)
+
+
+def _in_range(events, start, end):
+    if start is not None:
+        events = events.filter(occurred_at__gte=start)
+    if end is not None:
+        events = events.filter(occurred_at__lt=end)
+    return events.order_by('-occurred_at')
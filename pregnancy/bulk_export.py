@@ -0,0 +1,341 @@
+"""
+FHIR bulk data export for national health information system reporting.
+
+A ``BulkExportJob`` is created by the ``fhir/$export`` endpoint and run by
+``manage.py run_bulk_exports``, scheduled every minute:
+
+  1. ``plan()`` splits every source table into id ranges of
+     ``BULK_EXPORT_PARTITION_SIZE`` rows, found by walking the primary key
+     index, and records them as ``BulkExportPartition`` rows.
+  2. ``run()`` writes each unfinished partition to its own NDJSON file in
+     a process pool. A worker reads its range in keyset chunks (``id >
+     last id``), maps rows to FHIR resources and renames the file into
+     place only when it is complete.
+  3. The parent marks partitions complete as workers finish, which is
+     what the status endpoint reports as progress.
+
+Mapping: UserProfile (patients) -> Patient, HealthMetric -> one
+Observation per recorded vital sign, Appointment -> Encounter. Archived
+metrics and appointments are exported alongside the live ones. Patient ids
+are user ids, so Observation and Encounter subjects need no join.
+
+A job interrupted part-way (deploy, crash) keeps its finished partitions:
+once its heartbeat is older than ``STALE_AFTER`` the next run claims it
+again and writes only the missing files.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedHealthMetric, BulkExportJob, BulkExportPartition,
+    HealthMetric, UserProfile,
+)
+
+PATIENT = 'Patient'
+OBSERVATION = 'Observation'
+ENCOUNTER = 'Encounter'
+RESOURCE_TYPES = (PATIENT, OBSERVATION, ENCOUNTER)
+
+READ_CHUNK = 2000
+STALE_AFTER = timedelta(minutes=10)
+
+LOINC = 'http://loinc.org'
+UCUM = 'http://unitsofmeasure.org'
+VITAL_SIGNS = {
+    'coding': [{
+        'system': 'http://terminology.hl7.org/CodeSystem/observation-category',
+        'code': 'vital-signs', 'display': 'Vital Signs',
+    }],
+}
+AMBULATORY = {'system': 'http://terminology.hl7.org/CodeSystem/v3-ActCode', 'code': 'AMB', 'display': 'ambulatory'}
+ENCOUNTER_STATUSES = {
+    'scheduled': 'planned', 'confirmed': 'planned', 'in_progress': 'in-progress',
+    'completed': 'finished', 'cancelled': 'cancelled', 'no_show': 'cancelled',
+}
+
+_encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+# -------------------------------
+# Resource mapping
+# -------------------------------
+
+def _reference(user_id):
+    return {'reference': f'{PATIENT}/{user_id}'}
+
+
+def _quantity(value, unit, code):
+    return {'value': value, 'unit': unit, 'system': UCUM, 'code': code}
+
+
+def _compact(element):
+    # FHIR JSON allows neither empty strings nor nulls
+    return {key: value for key, value in element.items() if value not in ('', None, [''])}
+
+
+def patient(row):
+    resource = {
+        'resourceType': PATIENT,
+        'id': str(row['user_id']),
+        'meta': {'lastUpdated': row['updated_at']},
+        'identifier': [{'system': 'urn:lindamama:username', 'value': row['user__username']}],
+        'active': row['user__is_active'],
+        'gender': 'female',
+    }
+    name = _compact({'family': row['user__last_name'], 'given': [row['user__first_name']]})
+    if name:
+        resource['name'] = [name]
+    telecom = [{'system': 'email', 'value': row['user__email']}]
+    if row['phone_number']:
+        telecom.append({'system': 'phone', 'value': row['phone_number'], 'use': 'mobile'})
+    resource['telecom'] = telecom
+    if row['date_of_birth']:
+        resource['birthDate'] = row['date_of_birth']
+    if row['region'] or row['address']:
+        resource['address'] = [_compact({'text': row['address'], 'district': row['region']})]
+    if row['facility']:
+        resource['extension'] = [{
+            'url': 'urn:lindamama:planned-delivery-facility', 'valueString': row['facility'],
+        }]
+    return [resource]
+
+
+def observations(row):
+    """One vital-signs Observation per reading recorded on the metric."""
+    base = {
+        'status': 'final',
+        'category': [VITAL_SIGNS],
+        'subject': _reference(row['user_id']),
+        'effectiveDateTime': row['date'],
+    }
+    resources = []
+    if row['weight'] is not None:
+        resources.append({
+            'resourceType': OBSERVATION, 'id': f"{row['id']}-weight", **base,
+            'code': {'coding': [{'system': LOINC, 'code': '29463-7', 'display': 'Body weight'}]},
+            'valueQuantity': _quantity(float(row['weight']), 'kg', 'kg'),
+        })
+    systolic, diastolic = row['blood_pressure_systolic'], row['blood_pressure_diastolic']
+    if systolic is not None or diastolic is not None:
+        components = [
+            {'code': {'coding': [{'system': LOINC, 'code': code, 'display': display}]},
+             'valueQuantity': _quantity(value, 'mmHg', 'mm[Hg]')}
+            for code, display, value in (
+                ('8480-6', 'Systolic blood pressure', systolic),
+                ('8462-4', 'Diastolic blood pressure', diastolic),
+            )
+            if value is not None
+        ]
+        resources.append({
+            'resourceType': OBSERVATION, 'id': f"{row['id']}-bp", **base,
+            'code': {'coding': [{'system': LOINC, 'code': '85354-9', 'display': 'Blood pressure panel'}]},
+            'component': components,
+        })
+    if row['fetal_heart_rate'] is not None:
+        resources.append({
+            'resourceType': OBSERVATION, 'id': f"{row['id']}-fhr", **base,
+            'code': {'coding': [{'system': LOINC, 'code': '55283-6', 'display': 'Fetal Heart rate'}]},
+            'valueQuantity': _quantity(row['fetal_heart_rate'], 'beats/minute', '/min'),
+        })
+    return resources
+
+
+def encounter(row):
+    end = row['date_time'] + timedelta(minutes=row['duration'])
+    return [{
+        'resourceType': ENCOUNTER,
+        'id': str(row['id']),
+        'status': ENCOUNTER_STATUSES.get(row['status'], 'unknown'),
+        'class': AMBULATORY,
+        'type': [{'text': Appointment.AppointmentType(row['appointment_type']).label}],
+        'subject': _reference(row['user_id']),
+        'period': {'start': row['date_time'], 'end': end},
+        'participant': [{'individual': {'display': row['healthcare_provider']}}],
+        'location': [{'location': {'display': row['location']}}],
+    }]
+
+
+PATIENT_FIELDS = (
+    'id', 'user_id', 'user__username', 'user__first_name', 'user__last_name', 'user__email',
+    'user__is_active', 'phone_number', 'date_of_birth', 'address', 'region', 'facility', 'updated_at',
+)
+METRIC_FIELDS = (
+    'id', 'user_id', 'date', 'weight', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'fetal_heart_rate',
+)
+APPOINTMENT_FIELDS = (
+    'id', 'user_id', 'date_time', 'duration', 'appointment_type', 'status', 'healthcare_provider', 'location',
+)
+
+
+def _patients():
+    return UserProfile.objects.filter(role=UserProfile.Roles.PATIENT)
+
+
+# resource type -> [(source label, queryset factory, columns, mapper)]
+SOURCES = {
+    PATIENT: [
+        (UserProfile._meta.label, _patients, PATIENT_FIELDS, patient),
+    ],
+    OBSERVATION: [
+        (HealthMetric._meta.label, HealthMetric.objects.all, METRIC_FIELDS, observations),
+        (ArchivedHealthMetric._meta.label, ArchivedHealthMetric.objects.all, METRIC_FIELDS, observations),
+    ],
+    ENCOUNTER: [
+        (Appointment._meta.label, Appointment.objects.all, APPOINTMENT_FIELDS, encounter),
+        (ArchivedAppointment._meta.label, ArchivedAppointment.objects.all, APPOINTMENT_FIELDS, encounter),
+    ],
+}
+_SOURCES_BY_LABEL = {label: source for sources in SOURCES.values() for label, *source in sources}
+
+
+# -------------------------------
+# Jobs
+# -------------------------------
+
+def parse_types(value):
+    """Resource types from a ``_type`` parameter; raises ValueError for unknown ones."""
+    types = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = sorted(set(types) - set(RESOURCE_TYPES))
+    if unknown:
+        raise ValueError(f"Unsupported resource type(s): {', '.join(unknown)}")
+    return [name for name in RESOURCE_TYPES if name in types] or list(RESOURCE_TYPES)
+
+
+def create_job(user, types):
+    return BulkExportJob.objects.create(requested_by=user, resource_types=','.join(types))
+
+
+def job_dir(job):
+    return os.path.join(settings.BULK_EXPORT_DIR, str(job.pk))
+
+
+def claim_next(now=None):
+    """
+    Mark the oldest pending job, or a running job whose runner went quiet,
+    as running by this process. Returns it, or None.
+    """
+    now = now or timezone.now()
+    candidates = BulkExportJob.objects.filter(
+        Q(status=BulkExportJob.Status.PENDING)
+        | Q(status=BulkExportJob.Status.RUNNING, heartbeat_at__lt=now - STALE_AFTER)
+    ).order_by('created_at')
+    for job in candidates:
+        # Conditional update, so two overlapping runs cannot both take a job
+        claimed = BulkExportJob.objects.filter(
+            pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at,
+        ).update(status=BulkExportJob.Status.RUNNING, heartbeat_at=now, started_at=Coalesce('started_at', now))
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def _boundaries(queryset, size):
+    """Ids that start each range of ``size`` rows, walking the primary key index."""
+    ids = queryset.order_by('id').values_list('id', flat=True)
+    start = ids.first()
+    while start is not None:
+        yield start
+        start = next(iter(ids.filter(id__gte=start)[size:size + 1]), None)
+
+
+def plan(job, partition_size=None):
+    """Record the id ranges of every source table; a no-op once planned."""
+    if job.partitions.exists():
+        return
+    size = partition_size or settings.BULK_EXPORT_PARTITION_SIZE
+    partitions = []
+    for resource_type in job.types:
+        for label, queryset, _, _ in SOURCES[resource_type]:
+            starts = list(_boundaries(queryset(), size))
+            for number, start in enumerate(starts):
+                stop = starts[number + 1] if number + 1 < len(starts) else None
+                partitions.append(BulkExportPartition(
+                    job=job, resource_type=resource_type, source=label,
+                    number=number, start_id=start, stop_id=stop,
+                ))
+    with transaction.atomic():
+        BulkExportPartition.objects.bulk_create(partitions, ignore_conflicts=True)
+
+
+def write_partition(source, start_id, stop_id, path):
+    """Write one id range as NDJSON. Returns the number of resources written."""
+    queryset, columns, mapper = _SOURCES_BY_LABEL[source]
+    rows = queryset().filter(id__gte=start_id).order_by('id').values(*columns)
+    if stop_id is not None:
+        rows = rows.filter(id__lt=stop_id)
+    written = 0
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        chunk = list(rows[:READ_CHUNK])
+        while chunk:
+            lines = [_encoder.encode(resource) for row in chunk for resource in mapper(row)]
+            if lines:
+                f.write('\n'.join(lines) + '\n')
+            written += len(lines)
+            chunk = list(rows.filter(id__gt=chunk[-1]['id'])[:READ_CHUNK]) if len(chunk) == READ_CHUNK else []
+    os.replace(temp_path, path)
+    return written
+
+
+def _write_partition(task):
+    try:
+        return write_partition(*task)
+    finally:
+        connections.close_all()
+
+
+def run(job, workers=None, progress=None):
+    """Write every unfinished partition of ``job`` and mark it completed."""
+    try:
+        plan(job)
+        os.makedirs(job_dir(job), exist_ok=True)
+        pending = list(job.partitions.filter(completed_at__isnull=True))
+
+        # Children must open their own connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_write_partition, (
+                    partition.source, partition.start_id, partition.stop_id,
+                    os.path.join(job_dir(job), partition.filename),
+                )): partition
+                for partition in pending
+            }
+            for future in as_completed(futures):
+                partition = futures[future]
+                now = timezone.now()
+                BulkExportPartition.objects.filter(pk=partition.pk).update(resources=future.result(), completed_at=now)
+                BulkExportJob.objects.filter(pk=job.pk).update(heartbeat_at=now)
+                if progress:
+                    progress(*job_progress(job))
+    except Exception as e:
+        BulkExportJob.objects.filter(pk=job.pk).update(status=BulkExportJob.Status.FAILED, error=str(e), finished_at=timezone.now())
+        raise
+
+    BulkExportJob.objects.filter(pk=job.pk).update(status=BulkExportJob.Status.COMPLETED, finished_at=timezone.now())
+    job.refresh_from_db()
+    return job
+
+
+def job_progress(job):
+    """``(partitions written, partitions planned)``"""
+    counts = job.partitions.aggregate(total=Count('id'), done=Count('id', filter=Q(completed_at__isnull=False)))
+    return counts['done'], counts['total']
+
+
+def outputs(job):
+    """``(resource type, file name, resource count)`` per non-empty file, for the manifest."""
+    return [
+        (partition.resource_type, partition.filename, partition.resources)
+        for partition in job.partitions.filter(completed_at__isnull=False, resources__gt=0)
+    ]
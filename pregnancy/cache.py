@@ -0,0 +1,41 @@
+"""
+Cache backends that report hit/miss counts to Prometheus.
+
+Use these in ``CACHES`` in place of Django's own backends; set
+``METRICS_LABEL`` on the cache entry to tell several caches apart.
+"""
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import record_cache_lookup
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.metrics_label = params.get('METRICS_LABEL', 'default')
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache_lookup(self.metrics_label, 0, 1)
+            return default
+        record_cache_lookup(self.metrics_label, 1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        record_cache_lookup(self.metrics_label, len(found), len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
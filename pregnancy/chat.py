@@ -0,0 +1,147 @@
+"""
+Patient-clinician messaging.
+
+``send_message`` is the only write path for new messages: it stores the
+message, bumps the conversation and both participants' inbox rows, adds to
+the recipient's unread counters, and once the transaction commits pushes
+the message through the channel layer to every socket open on that
+conversation. The WebSocket consumer and the HTTP fallback both use it.
+
+Inbox listings and unread badges read only ``InboxEntry`` and
+``UserProfile.unread_message_count``; nothing counts over ``Message``.
+"""
+
+import logging
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Conversation, InboxEntry, Message, UserProfile
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4000
+HISTORY_PAGE_SIZE = 50
+INBOX_PAGE_SIZE = 20
+PREVIEW_LENGTH = 140
+
+
+def get_channel_layer():
+    try:
+        from channels.layers import get_channel_layer as channels_layer
+    except ImportError:
+        return None
+    return channels_layer()
+
+
+def broadcast(group_name, payload):
+    """Fan a message out to every consumer in the group (no-op without Channels)."""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        async_to_sync(layer.group_send)(group_name, {'type': 'chat.message', 'message': payload})
+    except Exception as e:
+        # The message is stored; clients pick it up on their next history load.
+        logger.warning(f"Could not broadcast to {group_name}: {e}")
+
+
+def send_message(conversation, sender, body):
+    """Store a message from ``sender`` and deliver it to connected clients."""
+    body = (body or '').strip()
+    if not body:
+        raise ValueError('Message cannot be empty.')
+    if len(body) > MAX_MESSAGE_LENGTH:
+        raise ValueError(f'Messages are limited to {MAX_MESSAGE_LENGTH} characters.')
+    if not conversation.has_participant(sender):
+        raise PermissionError('You are not part of this conversation.')
+
+    recipient_id = conversation.clinician_id if sender.pk == conversation.patient_id else conversation.patient_id
+    with transaction.atomic():
+        message = Message.objects.create(conversation=conversation, sender=sender, body=body)
+        Conversation.objects.filter(pk=conversation.pk).update(last_message_at=message.created_at)
+        entries = InboxEntry.objects.filter(conversation=conversation)
+        entries.update(last_activity_at=message.created_at, last_message_preview=body[:PREVIEW_LENGTH])
+        entries.filter(participant_id=recipient_id).update(unread_count=F('unread_count') + 1)
+        UserProfile.objects.filter(user_id=recipient_id).update(unread_message_count=F('unread_message_count') + 1)
+        payload = message.to_dict()
+        transaction.on_commit(lambda: broadcast(conversation.group_name, payload))
+    return message
+
+
+def mark_read(conversation, user):
+    """Mark everything the other participant sent as read and clear the counters."""
+    with transaction.atomic():
+        entry = InboxEntry.objects.select_for_update().filter(conversation=conversation, participant=user).first()
+        if entry is None or entry.unread_count == 0:
+            return 0
+        unread = entry.unread_count
+        InboxEntry.objects.filter(pk=entry.pk).update(unread_count=0)
+        UserProfile.objects.filter(user=user).update(
+            unread_message_count=Greatest(F('unread_message_count') - unread, 0)
+        )
+        Message.objects.filter(conversation=conversation, read_at__isnull=True).exclude(sender=user).update(read_at=timezone.now())
+    return unread
+
+
+def message_history(conversation, before_id=None, limit=HISTORY_PAGE_SIZE):
+    """Latest ``limit`` messages (oldest first), optionally older than ``before_id``."""
+    messages = conversation.messages.order_by('-created_at', '-id')
+    if before_id:
+        messages = messages.filter(id__lt=before_id)
+    return list(reversed(messages[:limit]))
+
+
+def start_conversation(user, other):
+    """Get or create the conversation between a patient and a clinician."""
+    roles = dict(UserProfile.objects.filter(user__in=[user, other]).values_list('user_id', 'role'))
+    if roles.get(user.pk) == UserProfile.Roles.PATIENT and roles.get(other.pk) == UserProfile.Roles.CLINICIAN:
+        patient, clinician = user, other
+    elif roles.get(user.pk) == UserProfile.Roles.CLINICIAN and roles.get(other.pk) == UserProfile.Roles.PATIENT:
+        patient, clinician = other, user
+    else:
+        raise PermissionError('Conversations are between a patient and a clinician.')
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(patient=patient, clinician=clinician)
+        if created:
+            InboxEntry.objects.bulk_create([
+                InboxEntry(participant=participant, conversation=conversation, last_activity_at=conversation.created_at)
+                for participant in (patient, clinician)
+            ])
+    return conversation
+
+
+def encode_cursor(entry):
+    return f'{entry.last_activity_at.isoformat()}|{entry.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, pk = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def inbox_page(user, cursor=None, limit=INBOX_PAGE_SIZE):
+    """
+    One page of the user's inbox, most recent first, and the cursor for the
+    next page (``None`` on the last page). Keyset pagination on
+    (last_activity_at, id) keeps every page an index range scan.
+    """
+    entries = (
+        InboxEntry.objects.filter(participant=user)
+        .select_related('conversation__patient', 'conversation__clinician')
+        .order_by('-last_activity_at', '-id')
+    )
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        timestamp, pk = position
+        entries = entries.filter(Q(last_activity_at__lt=timestamp) | Q(last_activity_at=timestamp, id__lt=pk))
+    page = list(entries[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
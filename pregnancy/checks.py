@@ -0,0 +1,24 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+IN_MEMORY_CHANNEL_LAYER = 'channels.layers.InMemoryChannelLayer'
+
+
+@register()
+def check_channel_layer(app_configs, **kwargs):
+    """The in-memory channel layer cannot fan messages out across gunicorn workers."""
+    backend = getattr(settings, 'CHANNEL_LAYERS', {}).get('default', {}).get('BACKEND')
+    try:
+        workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    except ValueError:
+        workers = 1
+    if backend == IN_MEMORY_CHANNEL_LAYER and workers > 1:
+        return [Warning(
+            f'WEB_CONCURRENCY is {workers} but the channel layer is in-memory, so messages '
+            'only reach participants connected to the same worker.',
+            hint='Set CHANNEL_LAYER_URL to a Redis server, or run a single worker.',
+            id='pregnancy.W001',
+        )]
+    return []
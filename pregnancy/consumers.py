@@ -0,0 +1,66 @@
+"""
+WebSocket consumers for real-time messaging.
+
+Each open socket is a coroutine on the server's event loop and joins its
+conversation's channel layer group; new messages are pushed to the group
+by ``chat.send_message``, so there is no polling and no thread per client.
+"""
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .chat import mark_read, send_message
+from .db_routers import use_primary
+from .models import Conversation
+
+
+class ConversationConsumer(AsyncJsonWebsocketConsumer):
+    """ws/messaging/<conversation_id>/ - send and receive messages in one conversation"""
+
+    conversation = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.conversation = await self.get_conversation(
+            self.scope['url_route']['kwargs']['conversation_id'], user,
+        )
+        if self.conversation is None:
+            await self.close(code=4403)
+            return
+
+        await self.channel_layer.group_add(self.conversation.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.conversation is not None:
+            await self.channel_layer.group_discard(self.conversation.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            await self.send_json({'type': 'error', 'error': 'Expected a JSON object.'})
+            return
+        if content.get('type') == 'read':
+            await database_sync_to_async(mark_read)(self.conversation, self.scope['user'])
+            return
+        try:
+            await database_sync_to_async(send_message)(
+                self.conversation, self.scope['user'], content.get('body', ''),
+            )
+        except (ValueError, PermissionError) as e:
+            await self.send_json({'type': 'error', 'error': str(e)})
+
+    async def chat_message(self, event):
+        await self.send_json({'type': 'message', 'message': event['message']})
+
+    @database_sync_to_async
+    def get_conversation(self, conversation_id, user):
+        # The socket usually opens right after the conversation was created
+        with use_primary():
+            conversation = Conversation.objects.filter(pk=conversation_id).first()
+        if conversation is None or not conversation.has_participant(user):
+            return None
+        return conversation
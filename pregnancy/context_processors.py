@@ -11,3 +11,21 @@ def app_settings(request):
         'DEBUG': settings.DEBUG,
         'PREGNANCY_TRACKER_CONFIG': settings.PREGNANCY_TRACKER_CONFIG,
     }
+
+def unread_messages(request):
+    """
+    Unread message count for the navigation badge. Reads the counter kept
+    on the profile, so it is one indexed lookup and only when rendered.
+    """
+    def count():
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return 0
+        from .models import UserProfile
+        return (
+            UserProfile.objects.filter(user=user)
+            .values_list('unread_message_count', flat=True)
+            .first() or 0
+        )
+
+    return {'UNREAD_MESSAGE_COUNT': count}
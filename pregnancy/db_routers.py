@@ -0,0 +1,101 @@
+"""
+Primary/replica database routing.
+
+Writes go to ``default``. Reads go to one of
+``settings.DATABASE_REPLICAS`` unless the current request is pinned to the
+primary: requests with unsafe methods, requests inside a transaction on
+the primary, and requests from a client that wrote within the last
+``REPLICA_PIN_SECONDS`` (tracked by ``ReplicaPinningMiddleware``) all read
+from ``default`` so users always see their own changes.
+
+Instances loaded from any other alias (``.using('benchmark_tuned')``, a
+migration's database) keep reading and writing there.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+
+class RoutingState:
+    """Per-request routing flags; mutable so worker threads share it."""
+
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside this block (e.g. right after a write elsewhere)."""
+    state = routing_state.get()
+    if state is None:
+        token = routing_state.set(RoutingState(pinned=True))
+        try:
+            yield
+        finally:
+            routing_state.reset(token)
+        return
+    previous, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = previous
+
+
+def _other_database(hints, replicas):
+    """The hinted instance's alias when it is neither the primary nor a replica."""
+    instance = hints.get('instance')
+    db = instance._state.db if instance is not None else None
+    if db and db != PRIMARY and db not in replicas:
+        return db
+    return None
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        other = _other_database(hints, replicas)
+        if other:
+            return other
+        if not replicas:
+            return PRIMARY
+        state = routing_state.get()
+        if (state is not None and (state.pinned or state.wrote)) or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are written back to the primary
+        other = _other_database(hints, getattr(settings, 'DATABASE_REPLICAS', []))
+        if other:
+            return other
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db == obj2._state.db:
+            return True
+        databases = {PRIMARY, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
@@ -0,0 +1,90 @@
+"""
+Expected-delivery (EDD) calendar for labor-ward capacity planning.
+
+The per-day counts come from ``DueDateCount``, which the UserProfile signals
+keep in step with due date, facility and role changes, so a 90-day view is
+at most 90 rows per facility however many pregnancies are active. The
+drill-down list of patients due in a range is keyset-paginated on
+(due_date, id) over the ``(facility, due_date)`` / ``(role, due_date)``
+profile indexes.
+"""
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import DueDateCount, UserProfile
+
+CAPACITY_DAYS = 90
+PAGE_SIZE = 50
+
+
+def capacity(start=None, days=CAPACITY_DAYS, facility=None):
+    """``[(day, patients due)]`` for every day from ``start``, zeros included."""
+    start = start or date.today()
+    end = start + timedelta(days=days - 1)
+    counts = DueDateCount.objects.filter(due_date__range=(start, end))
+    if facility is not None:
+        counts = counts.filter(facility=facility)
+    totals = dict(
+        counts.order_by().values('due_date').annotate(total=Sum('patients')).values_list('due_date', 'total')
+    )
+    return [(day, totals.get(day, 0)) for day in (start + timedelta(days=n) for n in range(days))]
+
+
+def facilities():
+    """Facilities with at least one patient due, for the calendar filter."""
+    return list(
+        DueDateCount.objects.filter(patients__gt=0, due_date__gte=date.today())
+        .order_by('facility').values_list('facility', flat=True).distinct()
+    )
+
+
+def encode_cursor(profile):
+    return f'{profile.due_date.isoformat()}|{profile.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        due_date, pk = cursor.split('|', 1)
+        return date.fromisoformat(due_date), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def due_patients_page(start, end, facility=None, cursor=None, limit=PAGE_SIZE):
+    """
+    Patients due between ``start`` and ``end`` (inclusive), soonest first,
+    and the cursor for the next page (``None`` on the last page).
+    """
+    patients = (
+        UserProfile.objects.patients()
+        .filter(due_date__range=(start, end))
+        .select_related('user')
+        .order_by('due_date', 'id')
+    )
+    if facility is not None:
+        patients = patients.filter(facility=facility)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        due_date, pk = position
+        patients = patients.filter(Q(due_date__gt=due_date) | Q(due_date=due_date, id__gt=pk))
+    page = list(patients[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def rebuild():
+    """Recount the calendar from UserProfile, e.g. after bulk updates that skip signals."""
+    rows = (
+        UserProfile.objects.patients()
+        .filter(due_date__isnull=False)
+        .order_by()
+        .values('facility', 'due_date')
+        .annotate(patients=Count('id'))
+    )
+    with transaction.atomic():
+        DueDateCount.objects.all().delete()
+        created = DueDateCount.objects.bulk_create([DueDateCount(**row) for row in rows], batch_size=1000)
+    return len(created)
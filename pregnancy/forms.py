@@ -179,7 +179,7 @@ class UserProfileForm(forms.ModelForm):
         model = UserProfile
         fields = [
             'first_name', 'last_name', 'email',  # User model fields
-            'phone_number', 'date_of_birth', 'address', 
+            'phone_number', 'date_of_birth', 'address', 'region', 'facility',
             'emergency_contact', 'blood_type', 'allergies',
             'due_date', 'last_menstrual_period', 'height', 'pre_pregnancy_weight',
             'pregnancy_type', 'gravida', 'para', 'has_high_risk', 'primary_care_physician'
@@ -198,6 +198,14 @@ class UserProfileForm(forms.ModelForm):
                 'rows': 3,
                 'placeholder': 'Enter your complete address'
             }),
+            'region': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'County (e.g. Nairobi)'
+            }),
+            'facility': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Hospital or health centre'
+            }),
             'emergency_contact': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Name and phone number'
@@ -0,0 +1,97 @@
+"""
+Gestational age, trimester and progress from LMP / EDD dates.
+
+``gestational_age()`` is the one implementation: it takes arrays of last
+menstrual period and due dates and computes every row in a single
+vectorized pass. Gestation counts from the LMP, or from EDD - 280 days
+when only the due date is known. Rows with neither date, or a start date
+after ``today``, are invalid.
+
+List views call ``attach()`` on their profiles once, and each
+``UserProfile.calculate_pregnancy_week()`` call in the template then
+reads the precomputed row. Single profiles fall back to ``week_data()``.
+"""
+
+from datetime import date
+
+import numpy as np
+
+TERM_DAYS = 280
+TERM_WEEKS = 40
+MAX_WEEK = 42
+# First week of the second and third trimesters
+TRIMESTER_STARTS = (14, 27)
+
+
+def _dates(values):
+    # None becomes NaT
+    return np.asarray(values, dtype='datetime64[D]')
+
+
+def gestational_days(lmp, due, today):
+    """Days since LMP, falling back to EDD - 280 days; rows without either date are -1."""
+    start = np.where(np.isnat(lmp), due - np.timedelta64(TERM_DAYS, 'D'), lmp)
+    days = (np.datetime64(today, 'D') - start).astype('timedelta64[D]')
+    return np.where(np.isnat(start), -1, days.astype(np.int64))
+
+
+def trimesters(weeks):
+    """Trimester number (1-3) for each current pregnancy week."""
+    return np.digitize(weeks, TRIMESTER_STARTS) + 1
+
+
+def gestational_age(lmp, due, today=None):
+    """
+    Columns for every row of ``lmp`` / ``due`` (``datetime64[D]`` arrays or
+    sequences of dates): ``valid``, ``total_days``, ``week`` (1-42),
+    ``day``, ``weeks_completed``, ``trimester``, ``progress`` (percent of
+    40 weeks) and ``estimated_due_date``.
+    """
+    lmp, due = _dates(lmp), _dates(due)
+    days = gestational_days(lmp, due, today or date.today())
+    valid = days >= 0
+    days = np.where(valid, days, 0)
+
+    weeks_completed = days // 7
+    week = np.minimum(weeks_completed + 1, MAX_WEEK)
+    return {
+        'valid': valid,
+        'total_days': days,
+        'week': week,
+        'day': days % 7,
+        'weeks_completed': weeks_completed,
+        'trimester': trimesters(week),
+        'progress': np.minimum(100.0, week / TERM_WEEKS * 100),
+        'estimated_due_date': np.where(np.isnat(lmp), due, lmp + np.timedelta64(TERM_DAYS, 'D')),
+    }
+
+
+def rows(columns):
+    """Turn ``gestational_age()`` columns into per-row dicts (``None`` for invalid rows)."""
+    keys = [key for key in columns if key != 'valid']
+    values = [columns[key].tolist() for key in keys]
+    return [
+        dict(zip(keys, row)) if valid else None
+        for valid, *row in zip(columns['valid'].tolist(), *values)
+    ]
+
+
+def week_data(lmp, due=None, today=None):
+    """Gestational age for a single pregnancy, or ``None``."""
+    return rows(gestational_age([lmp], [due], today))[0]
+
+
+def attach(profiles, today=None):
+    """
+    Compute gestational age for a list of profiles in one pass and cache
+    it on each, so per-row template calls do no further work.
+    """
+    today = today or date.today()
+    data = rows(gestational_age(
+        [profile.last_menstrual_period for profile in profiles],
+        [profile.due_date for profile in profiles],
+        today,
+    ))
+    for profile, row in zip(profiles, data):
+        profile._gestation = ((profile.last_menstrual_period, profile.due_date, today), row)
+    return profiles
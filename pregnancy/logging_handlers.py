@@ -0,0 +1,231 @@
+"""
+Non-blocking log handlers for the Linda Mama platform.
+
+Request threads only put records on an in-memory queue. A single writer
+thread per process drains the queue, formats records (JSON in production)
+and appends them to their files in batches. Rotation takes an exclusive
+lock on a sidecar ``.lock`` file so several gunicorn workers can share one
+log file without clobbering each other's rollovers.
+"""
+
+import contextvars
+import copy
+import logging
+import os
+import queue
+import threading
+from logging.handlers import RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+# Correlation ID of the request being handled; set by RequestIdMiddleware.
+request_id_var = contextvars.ContextVar('request_id', default='-')
+
+
+def get_request_id():
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every record with the current request's correlation ID."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class ProcessSafeRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that can be shared by several processes.
+
+    Writes and rollovers happen under an ``flock`` on ``<filename>.lock``;
+    if another process rotated the file first, the stream is reopened
+    instead of rotating a second time.
+    """
+
+    def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding='utf-8', delay=True):
+        super().__init__(filename, mode, maxBytes, backupCount, encoding, delay)
+        self._lock_path = self.baseFilename + '.lock'
+        self._lock_file = None
+
+    def _acquire_file_lock(self):
+        if fcntl is None:
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self._lock_path, 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+    def _release_file_lock(self):
+        if fcntl is not None and self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            self.stream = self._open()
+            return
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            on_disk = None
+        current = os.fstat(self.stream.fileno())
+        if on_disk is None or (on_disk.st_dev, on_disk.st_ino) != (current.st_dev, current.st_ino):
+            self.stream.close()
+            self.stream = self._open()
+
+    def write_batch(self, text):
+        """Append already formatted text, rotating first if it would not fit."""
+        self._acquire_file_lock()
+        try:
+            self._reopen_if_rotated()
+            if self.maxBytes > 0:
+                size = os.fstat(self.stream.fileno()).st_size
+                if size and size + len(text.encode(self.encoding or 'utf-8')) > self.maxBytes:
+                    self.doRollover()
+                    if self.stream is None:
+                        self.stream = self._open()
+            self.stream.write(text)
+            self.stream.flush()
+        finally:
+            self._release_file_lock()
+
+    def close(self):
+        super().close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+class _LogWriter:
+    """
+    The per-process writer thread shared by every ``QueuedRotatingFileHandler``.
+    Records are drained in batches, grouped by handler and written with one
+    ``write`` call per file.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue_size=10000, batch_size=500):
+        self.queue = queue.Queue(max_queue_size)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self.thread.start()
+
+    def put(self, handler, record):
+        try:
+            self.queue.put_nowait((handler, record))
+        except queue.Full:
+            # Never block a request on logging; report the loss on the next batch.
+            self.dropped += 1
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain(self.queue.get())
+            stop = any(item is self._STOP for item in batch)
+            self._write([item for item in batch if item is not self._STOP])
+            if stop:
+                return
+
+    def _write(self, batch):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            for handler in {handler for handler, _ in batch}:
+                notice = logging.LogRecord(
+                    __name__, logging.WARNING, __file__, 0,
+                    'Log queue full, dropped %d records', (dropped,), None,
+                )
+                notice.request_id = '-'
+                batch.append((handler, handler.prepare(notice)))
+
+        grouped = {}
+        for handler, record in batch:
+            try:
+                line = handler.format(record)
+            except Exception:
+                handler.handleError(record)
+                continue
+            grouped.setdefault(handler, []).append((record, line))
+
+        for handler, entries in grouped.items():
+            try:
+                handler.target.write_batch(''.join(line + '\n' for _, line in entries))
+            except Exception:
+                handler.handleError(entries[0][0])
+
+    def stop(self, timeout=5):
+        self.queue.put(self._STOP)
+        self.thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    # Re-create after fork: the parent's thread does not exist in the child.
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = _LogWriter()
+    return _writer
+
+
+class QueuedRotatingFileHandler(logging.Handler):
+    """
+    Log handler that hands records to the background writer and returns
+    immediately. Configure it like ``RotatingFileHandler``.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8'):
+        super().__init__()
+        self.target = ProcessSafeRotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding,
+        )
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Resolve everything that may change or hold references once the
+        # request has moved on: message arguments and the traceback. Works
+        # on a copy, as QueueHandler does, so other handlers of the same
+        # logger still see the original record and its exc_info.
+        message = record.getMessage()
+        exc_text = self._exc_formatter.formatException(record.exc_info) if record.exc_info else None
+        record = copy.copy(record)
+        record.message = message
+        record.msg = record.message
+        record.args = None
+        if exc_text:
+            record.exc_text = exc_text
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            _get_writer().put(self, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        global _writer
+        writer = _writer
+        if writer is not None and writer.pid == os.getpid() and writer.thread.is_alive():
+            with _writer_lock:
+                if _writer is writer:
+                    _writer = None
+            writer.stop()
+        self.target.close()
+        super().close()
@@ -0,0 +1,51 @@
+"""
+Move finished-pregnancy health metrics and old appointments to the archive
+tables in batches. Safe to interrupt and re-run; see ``pregnancy.archive``.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...archive import (
+    DEFAULT_BATCH_SIZE,
+    archivable_appointments,
+    archivable_health_metrics,
+    move_batch,
+)
+from ...models import ArchivedAppointment, ArchivedHealthMetric
+
+TARGETS = {
+    'metrics': (archivable_health_metrics, ArchivedHealthMetric),
+    'appointments': (archivable_appointments, ArchivedAppointment),
+}
+
+
+class Command(BaseCommand):
+    help = 'Move completed-pregnancy health metrics and past appointments to the archive tier'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=list(TARGETS), help='Archive only metrics or appointments')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to spare the database')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        targets = [options['only']] if options['only'] else list(TARGETS)
+        for name in targets:
+            select, archive_model = TARGETS[name]
+            if options['dry_run']:
+                self.stdout.write(f'{name}: {select().count()} rows would be archived')
+                continue
+
+            moved = 0
+            while True:
+                batch = move_batch(select(), archive_model, options['batch_size'])
+                if not batch:
+                    break
+                moved += batch
+                self.stdout.write(f'{name}: {moved} archived', ending='\r')
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'{name}: {moved} rows archived'))
@@ -0,0 +1,133 @@
+"""
+Measure concurrent write throughput on SQLite with and without the tuned
+connection options (``settings.SQLITE_OPTIONS``).
+
+Each run migrates a scratch database file, then starts ``--writers``
+threads, each with its own connection, that insert a ``HealthMetric`` and
+an ``Appointment`` per transaction. Failed transactions ("database is
+locked") are counted rather than retried; any other error also counts as
+a failure and is reported, and the command fails if a mode commits
+nothing.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from ...models import Appointment, HealthMetric, User
+
+MODES = {
+    'default': {},
+    'tuned': settings.SQLITE_OPTIONS,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent HealthMetric/Appointment inserts on SQLite, default vs tuned pragmas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads')
+        parser.add_argument('--transactions', type=int, default=200, help='Transactions per writer')
+        parser.add_argument('--mode', choices=[*MODES, 'both'], default='both')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('benchmark_sqlite only applies to SQLite databases')
+
+        workdir = tempfile.mkdtemp(prefix='lindamama-bench-')
+        try:
+            modes = list(MODES) if options['mode'] == 'both' else [options['mode']]
+            errors = {}
+            results = [self.run(mode, workdir, options['writers'], options['transactions'], errors) for mode in modes]
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{options['writers']} writers x {options['transactions']} transactions"
+        ))
+        self.stdout.write(f"{'mode':<10}{'committed':>10}{'failed':>8}{'seconds':>10}{'tx/s':>10}{'p99 ms':>10}")
+        for mode, committed, failed, elapsed, p99 in results:
+            self.stdout.write(
+                f'{mode:<10}{committed:>10}{failed:>8}{elapsed:>10.2f}{committed / elapsed:>10.1f}{p99 * 1000:>10.1f}'
+            )
+        for mode, error in errors.items():
+            self.stderr.write(f'{mode}: {error}')
+        idle = [mode for mode, committed, *_ in results if not committed]
+        if idle:
+            raise CommandError(f"No transaction committed in mode {', '.join(idle)}")
+
+    def run(self, mode, workdir, writers, transactions, errors):
+        alias = f'benchmark_{mode}'
+        connections.settings[alias] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(workdir, f'{mode}.sqlite3'),
+            'OPTIONS': dict(MODES[mode]),
+        }
+        call_command('migrate', database=alias, verbosity=0)
+        # One user per writer (metrics are unique per user and day). bulk_create
+        # skips the profile signals, which would write to the default database.
+        User.objects.using(alias).bulk_create([
+            User(username=f'benchmark{n}', email=f'benchmark{n}@example.com') for n in range(writers)
+        ])
+        users = list(User.objects.using(alias).order_by('username'))
+        connections[alias].close()
+
+        today = timezone.localdate()
+        committed, failed, latencies = [], [], []
+        lock = threading.Lock()
+        start_event = threading.Event()
+
+        def writer(number):
+            user = users[number]
+            ok = failures = 0
+            timings = []
+            start_event.wait()
+            for i in range(transactions):
+                began = time.perf_counter()
+                try:
+                    with transaction.atomic(using=alias):
+                        HealthMetric.objects.using(alias).create(
+                            user=user, date=today - timedelta(days=i), weight=65, blood_pressure_systolic=118,
+                            blood_pressure_diastolic=76, notes=f'writer {number} #{i}',
+                        )
+                        Appointment.objects.using(alias).create(
+                            user=user, date_time=timezone.now() + timedelta(days=i % 30),
+                            location='Clinic', healthcare_provider='Benchmark',
+                        )
+                    ok += 1
+                    timings.append(time.perf_counter() - began)
+                except OperationalError:
+                    failures += 1
+                except Exception as exc:
+                    failures += 1
+                    # Keep the first unexpected error of the run for the report
+                    with lock:
+                        errors.setdefault(mode, f'writer {number}: {exc!r}')
+            connections[alias].close()
+            with lock:
+                committed.append(ok)
+                failed.append(failures)
+                latencies.extend(timings)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for thread in threads:
+            thread.start()
+        began = time.perf_counter()
+        start_event.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        del connections.settings[alias]
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+        return mode, sum(committed), sum(failed), elapsed, p99
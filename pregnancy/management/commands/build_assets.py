@@ -0,0 +1,37 @@
+"""
+Concatenate and minify the bundles in ``STATIC_BUNDLES``.
+
+Run before ``collectstatic`` (see build.sh), which hashes the output and
+writes the precompressed variants.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...assets import KINDS, build_bundle, bundle_path, bundle_sources
+
+
+class Command(BaseCommand):
+    help = 'Build minified per-page JS/CSS bundles into STATIC_BUNDLE_DIR'
+
+    def handle(self, *args, **options):
+        output_dir = Path(settings.STATIC_BUNDLE_DIR)
+        for name in settings.STATIC_BUNDLES:
+            for kind in KINDS:
+                if not bundle_sources(name, kind):
+                    continue
+                try:
+                    content = build_bundle(name, kind)
+                except FileNotFoundError as e:
+                    raise CommandError(str(e))
+
+                target = output_dir / bundle_path(name, kind)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(content, encoding='utf-8')
+                self.stdout.write(
+                    f'{bundle_path(name, kind)}: {len(bundle_sources(name, kind))} files, '
+                    f'{len(content.encode()) / 1024:.1f} KB'
+                )
+        self.stdout.write(self.style.SUCCESS(f'Bundles written to {output_dir}'))
@@ -0,0 +1,23 @@
+"""
+Compile the per-language milestone catalog served by the milestone pages.
+
+Run at deploy time (build.sh does) and after editing milestones or their
+translations; running processes keep the catalog they loaded until restart.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ... import milestone_catalog
+
+
+class Command(BaseCommand):
+    help = 'Write milestones.<language>.json for every configured language'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', action='append', dest='languages',
+                            help='Only compile this language (repeatable)')
+
+    def handle(self, *args, **options):
+        for language in options['languages'] or milestone_catalog.languages():
+            path, count = milestone_catalog.compile_catalog(language)
+            self.stdout.write(self.style.SUCCESS(f'{count} milestones -> {path}'))
@@ -0,0 +1,140 @@
+"""
+Measure how long a fresh process takes to become ready to serve.
+
+Starts a new interpreter with ``-X importtime``, loads ``WSGI_APPLICATION``
+with every ``AppConfig.ready()`` timed, serves one request through it and
+reports where the time went.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MARKER = '__STARTUP_PROFILE__'
+
+PROBE = r'''
+import io, json, sys, time
+start = time.perf_counter()
+
+from django.apps.config import AppConfig
+
+ready_times = {}
+_create = AppConfig.create.__func__
+
+def _timed_create(cls, entry):
+    config = _create(cls, entry)
+    ready = config.ready
+    def timed_ready():
+        began = time.perf_counter()
+        ready()
+        ready_times[config.label] = time.perf_counter() - began
+    config.ready = timed_ready
+    return config
+
+AppConfig.create = classmethod(_timed_create)
+
+import importlib
+module_name, _, attr = sys.argv[2].rpartition('.')
+application = getattr(importlib.import_module(module_name), attr)
+setup_done = time.perf_counter()
+
+status = []
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+}
+for _ in application(environ, lambda s, h, e=None: status.append(s)):
+    pass
+first_response = time.perf_counter()
+
+print(%(marker)r + json.dumps({
+    'setup': setup_done - start,
+    'first_response': first_response - start,
+    'status': status[0] if status else None,
+    'ready': ready_times,
+}))
+''' % {'marker': MARKER}
+
+
+def parse_importtime(stderr):
+    """Return ``[(module, self_us, cumulative_us, depth)]`` from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report import time per module and per app ready(), and time to first response'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/login/', help='URL to request once the app is loaded')
+        parser.add_argument('--top', type=int, default=25, help='Number of slowest modules to list')
+        parser.add_argument('--fast', action='store_true', help='Profile with FAST_STARTUP=True')
+        parser.add_argument('--check', action='store_true',
+                            help='Exit with an error if first response exceeds STARTUP_TARGET_SECONDS')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'pregnancy_tracker.settings'))
+        if options['fast']:
+            env['FAST_STARTUP'] = 'True'
+
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, options['path'], settings.WSGI_APPLICATION],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        result = None
+        for line in proc.stdout.splitlines():
+            if line.startswith(MARKER):
+                result = json.loads(line[len(MARKER):])
+        if proc.returncode != 0 or result is None:
+            raise CommandError(f'Startup probe failed:\n{proc.stderr[-2000:]}')
+
+        rows = parse_importtime(proc.stderr)
+        self.report_modules(rows, options['top'])
+        self.report_packages(rows)
+        self.report_ready(result['ready'])
+
+        target = getattr(settings, 'STARTUP_TARGET_SECONDS', None)
+        self.stdout.write('')
+        self.stdout.write(f"WSGI application loaded: {result['setup'] * 1000:8.1f} ms")
+        self.stdout.write(f"First response ({options['path']} -> {result['status']}): {result['first_response'] * 1000:8.1f} ms")
+        if target:
+            within = result['first_response'] <= target
+            style = self.style.SUCCESS if within else self.style.ERROR
+            self.stdout.write(style(f'Target: {target * 1000:.0f} ms ({"met" if within else "missed"})'))
+            if options['check'] and not within:
+                raise CommandError('Time to first response is over STARTUP_TARGET_SECONDS')
+
+    def report_modules(self, rows, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Slowest {top} imports (cumulative)'))
+        for name, self_us, cumulative_us, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+            self.stdout.write(f'{cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}')
+
+    def report_packages(self, rows):
+        totals = defaultdict(int)
+        for name, self_us, _, _ in rows:
+            totals[name.split('.')[0]] += self_us
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time by top-level package (self)'))
+        for package, total in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:15]:
+            self.stdout.write(f'{total / 1000:8.1f} ms  {package}')
+
+    def report_ready(self, ready):
+        self.stdout.write(self.style.MIGRATE_HEADING('AppConfig.ready()'))
+        for label, seconds in sorted(ready.items(), key=lambda item: item[1], reverse=True):
+            self.stdout.write(f'{seconds * 1000:8.1f} ms  {label}')
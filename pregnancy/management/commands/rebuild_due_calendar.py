@@ -0,0 +1,18 @@
+"""
+Recount the expected-delivery calendar from patient profiles.
+
+The counts are kept current by signals; run this after imports or
+``QuerySet.update()`` calls on due dates, which bypass them.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ... import due_calendar
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-day, per-facility due date counts'
+
+    def handle(self, *args, **options):
+        rows = due_calendar.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{rows} calendar days counted'))
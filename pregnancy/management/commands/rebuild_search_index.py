@@ -0,0 +1,21 @@
+"""
+Rebuild the full-text search index over milestones and resources.
+
+Signals keep the index current for edits made through the ORM; run this
+after deploying (build.sh does) and after loading fixtures or raw SQL.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ... import search
+
+
+class Command(BaseCommand):
+    help = 'Reindex pregnancy milestones and resources for content search'
+
+    def handle(self, *args, **options):
+        if not search.supported():
+            self.stdout.write(self.style.WARNING('Content search is not available on this database'))
+            return
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{count} milestones and resources indexed'))
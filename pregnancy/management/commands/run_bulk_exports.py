@@ -0,0 +1,47 @@
+"""
+Run requested FHIR bulk exports.
+
+Schedule it every minute; each run takes the pending jobs one at a time,
+plus any job whose previous runner stopped part-way, and writes the files
+that are still missing. ``--job`` reruns a specific (e.g. failed) job.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ... import bulk_export
+from ...models import BulkExportJob
+
+
+class Command(BaseCommand):
+    help = 'Write the NDJSON files of pending FHIR bulk export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, help='Resume this job, whatever its status')
+        parser.add_argument('--workers', type=int, default=None, help='Writer processes (default: CPU count)')
+
+    def handle(self, *args, **options):
+        if options['job']:
+            job = BulkExportJob.objects.filter(pk=options['job']).first()
+            if job is None:
+                raise CommandError(f"No bulk export job {options['job']}")
+            BulkExportJob.objects.filter(pk=job.pk).update(
+                status=BulkExportJob.Status.RUNNING, heartbeat_at=timezone.now(), error='', finished_at=None,
+            )
+            jobs = [job]
+        else:
+            jobs = iter(bulk_export.claim_next, None)
+
+        for job in jobs:
+            self.stdout.write(f'Bulk export {job.pk}: {", ".join(job.types)}')
+            try:
+                job = bulk_export.run(
+                    job,
+                    workers=options['workers'],
+                    progress=lambda done, total: self.stdout.write(f'{done}/{total} files written', ending='\r'),
+                )
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Bulk export {job.pk} failed: {e}'))
+                continue
+            seconds = (job.finished_at - job.started_at).total_seconds()
+            self.stdout.write(self.style.SUCCESS(f'Bulk export {job.pk} completed in {seconds:.1f}s'))
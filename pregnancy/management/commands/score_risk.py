@@ -0,0 +1,32 @@
+"""
+Run the hypertension / weight-gain risk rules over new health metrics.
+
+Schedule it every few minutes; each run only reads metrics added or edited
+since the previous one. Use ``--backfill`` once to score historical data in parallel.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ... import risk
+
+
+class Command(BaseCommand):
+    help = 'Score health metrics added or edited since the last run and record risk flags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=risk.BATCH_SIZE)
+        parser.add_argument('--backfill', action='store_true',
+                            help='Score all existing metrics in parallel chunks')
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='Metric ids per backfill chunk')
+        parser.add_argument('--workers', type=int, default=None, help='Backfill processes (default: CPU count)')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            processed, flagged = risk.backfill(
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                progress=lambda done, flags: self.stdout.write(f'{done} metrics scored', ending='\r'),
+            )
+        else:
+            processed, flagged = risk.score_new_metrics(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} metrics scored, {flagged} risk flags raised'))
@@ -0,0 +1,274 @@
+"""
+Prometheus instrumentation for the Linda Mama platform.
+
+Request latency, database query time, cache hit/miss counts and email
+delivery are recorded here and exposed on ``/metrics``. When gunicorn runs
+several workers, ``PROMETHEUS_MULTIPROC_DIR`` is set by ``gunicorn.conf.py``
+so every worker writes its samples to a shared directory and the scrape
+aggregates them across processes.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# -------------------------------
+# HTTP
+# -------------------------------
+
+REQUEST_LATENCY = Histogram(
+    'lindamama_http_request_duration_seconds',
+    'Time spent handling a request, by URL name and method.',
+    ['view', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_TOTAL = Counter(
+    'lindamama_http_requests_total',
+    'Requests handled, by URL name, method and status code.',
+    ['view', 'method', 'status'],
+)
+
+# -------------------------------
+# Database
+# -------------------------------
+
+DB_QUERY_LATENCY = Histogram(
+    'lindamama_db_query_duration_seconds',
+    'Time spent executing a single SQL statement, by database alias and URL name.',
+    ['alias', 'view'],
+    buckets=QUERY_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'lindamama_db_queries_per_request',
+    'Number of SQL statements executed while handling one request.',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'lindamama_db_pool_connections',
+    'Connections held by the connection pools, by alias and state (idle or in_use).',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_MAX_SIZE = Gauge(
+    'lindamama_db_pool_max_size',
+    'Configured maximum pool size, summed over worker processes.',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITING = Gauge(
+    'lindamama_db_pool_requests_waiting',
+    'Threads currently waiting for a pooled connection.',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAIT = Counter(
+    'lindamama_db_pool_wait_seconds',
+    'Total time spent waiting for a pooled connection.',
+    ['alias'],
+)
+DB_POOL_EVENTS = Counter(
+    'lindamama_db_pool_events',
+    'Pool events: queued requests, timeouts, lost connections and connections returned broken.',
+    ['alias', 'event'],
+)
+
+# psycopg_pool stats key -> DB_POOL_EVENTS label
+POOL_EVENT_STATS = {
+    'requests_queued': 'queued',
+    'requests_errors': 'timeout',
+    'connections_lost': 'lost',
+    'returns_bad': 'bad_return',
+}
+
+# -------------------------------
+# Cache
+# -------------------------------
+
+CACHE_REQUESTS = Counter(
+    'lindamama_cache_requests_total',
+    'Cache lookups, by cache and result (hit or miss).',
+    ['cache', 'result'],
+)
+
+# -------------------------------
+# Email
+# -------------------------------
+
+EMAILS_SENT = Counter(
+    'lindamama_emails_total',
+    'Emails handed to the mail backend, by kind and result.',
+    ['kind', 'result'],
+)
+EMAIL_OUTBOX = Gauge(
+    'lindamama_email_outbox_depth',
+    'Emails currently being delivered by request threads.',
+    multiprocess_mode='livesum',
+)
+
+
+def is_multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def record_cache_lookup(cache_name, hits, misses):
+    """Count cache hits and misses for one lookup."""
+    if hits:
+        CACHE_REQUESTS.labels(cache_name, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache_name, 'miss').inc(misses)
+
+
+@contextmanager
+def track_email(kind):
+    """Count an outgoing email and keep it in the outbox gauge while it is sent."""
+    EMAIL_OUTBOX.inc()
+    try:
+        yield
+    except Exception:
+        EMAILS_SENT.labels(kind, 'failed').inc()
+        raise
+    else:
+        EMAILS_SENT.labels(kind, 'sent').inc()
+    finally:
+        EMAIL_OUTBOX.dec()
+
+
+# Per-request statement timings; sync_to_async copies the context, so
+# queries run on worker threads are attributed to the right request.
+request_queries = ContextVar('request_queries', default=None)
+
+
+class QueryTimer:
+    """
+    Database execute wrapper that times every statement and adds it to the
+    current request's list. Installed once per connection object.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        queries = request_queries.get()
+        if queries is None:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            queries.append((self.alias, time.perf_counter() - start))
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if not any(isinstance(wrapper, QueryTimer) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(QueryTimer(connection.alias))
+
+
+def pooled_aliases():
+    return [
+        alias for alias, database in settings.DATABASES.items()
+        if database.get('OPTIONS', {}).get('pool')
+    ]
+
+
+def observe_db_pools():
+    """
+    Copy this process's pool sizes into the gauges and add the counters
+    accumulated since the last call (``pop_stats`` resets them).
+    """
+    for alias in pooled_aliases():
+        pool = connections[alias].pool
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        available = stats.get('pool_available', 0)
+        DB_POOL_CONNECTIONS.labels(alias, 'idle').set(available)
+        DB_POOL_CONNECTIONS.labels(alias, 'in_use').set(stats.get('pool_size', 0) - available)
+        DB_POOL_MAX_SIZE.labels(alias).set(stats.get('pool_max', 0))
+        DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+        if stats.get('requests_wait_ms'):
+            DB_POOL_WAIT.labels(alias).inc(stats['requests_wait_ms'] / 1000)
+        for key, event in POOL_EVENT_STATS.items():
+            if stats.get(key):
+                DB_POOL_EVENTS.labels(alias, event).inc(stats[key])
+
+
+def observe_request(view, method, status_code, duration, queries):
+    REQUEST_LATENCY.labels(view, method).observe(duration)
+    REQUESTS_TOTAL.labels(view, method, str(status_code)).inc()
+    DB_QUERIES_PER_REQUEST.labels(view).observe(len(queries))
+    for alias, query_duration in queries:
+        DB_QUERY_LATENCY.labels(alias, view).observe(query_duration)
+
+
+class ActiveSessionsCollector:
+    """Reports unexpired sessions at scrape time."""
+
+    def collect(self):
+        from django.contrib.sessions.models import Session
+
+        gauge = GaugeMetricFamily(
+            'lindamama_active_sessions',
+            'Sessions in the session store that have not expired.',
+        )
+        try:
+            gauge.add_metric([], Session.objects.filter(expire_date__gt=timezone.now()).count())
+        except Exception as e:
+            logger.warning(f"Could not count active sessions: {e}")
+            return
+        yield gauge
+
+
+def _build_registry():
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    registry.register(ActiveSessionsCollector())
+    return registry
+
+
+_registry = None
+
+
+def _client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    global _registry
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if not (settings.DEBUG or _client_ip(request) in allowed_ips or request.user.is_staff):
+        return HttpResponseForbidden('Metrics are not available from this address.')
+
+    if _registry is None:
+        _registry = _build_registry()
+    return HttpResponse(generate_latest(_registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,192 @@
+"""
+Request middleware for the pregnancy app.
+
+All middleware classes here work in sync (WSGI) and async (ASGI) stacks so
+async views are not pushed back onto a thread.
+"""
+
+import math
+import re
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics, ratelimit
+from .db_routers import RoutingState, routing_state
+from .logging_handlers import request_id_var
+
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class HybridMiddleware:
+    """Base class for middleware that can run in either a sync or async stack."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = self.before(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.cleanup(state)
+        return self.after(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.before(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.cleanup(state)
+        return self.after(request, response, state)
+
+    def before(self, request):
+        return None
+
+    def cleanup(self, state):
+        pass
+
+    def after(self, request, response, state):
+        return response
+
+
+class RequestIdMiddleware(HybridMiddleware):
+    """
+    Give every request a correlation ID for the logs. An ``X-Request-ID``
+    header from the proxy is reused when it looks sane; otherwise a new one
+    is generated. The ID is echoed back on the response.
+    """
+
+    header = 'X-Request-ID'
+
+    def before(self, request):
+        incoming = request.headers.get(self.header, '')
+        request.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        return request_id_var.set(request.request_id)
+
+    def cleanup(self, token):
+        request_id_var.reset(token)
+
+    def after(self, request, response, token):
+        response[self.header] = request.request_id
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Record request latency, status codes and per-statement database time,
+    labelled by the resolved URL name so dashboards can be alerted on
+    individually, and refresh the connection pool gauges.
+    """
+
+    def before(self, request):
+        queries = []
+        return time.perf_counter(), queries, metrics.request_queries.set(queries)
+
+    def cleanup(self, state):
+        metrics.request_queries.reset(state[2])
+
+    def after(self, request, response, state):
+        start, queries, _ = state
+        metrics.observe_request(
+            self.view_name(request), request.method, response.status_code,
+            time.perf_counter() - start, queries,
+        )
+        metrics.observe_db_pools()
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<unresolved>'
+        return match.view_name or match.func.__name__
+
+
+class ReplicaPinningMiddleware(HybridMiddleware):
+    """
+    Read-your-writes for the replica router. Unsafe requests and clients
+    holding the pin cookie read from the primary; a request that writes
+    sets the cookie for ``REPLICA_PIN_SECONDS`` so the pages that follow do
+    too, even before the replicas have caught up.
+    """
+
+    cookie_name = 'db_primary_pin'
+
+    def before(self, request):
+        pinned = request.method not in ('GET', 'HEAD', 'OPTIONS') or self.cookie_name in request.COOKIES
+        state = RoutingState(pinned=pinned)
+        return state, routing_state.set(state)
+
+    def cleanup(self, state):
+        routing_state.reset(state[1])
+
+    def after(self, request, response, state):
+        if state[0].wrote and getattr(settings, 'DATABASE_REPLICAS', []):
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class RateLimitMiddleware(HybridMiddleware):
+    """
+    Token-bucket limits per client IP and per account for the URL names in
+    ``settings.RATE_LIMITS`` (see ``pregnancy.ratelimit``). The check runs
+    in ``process_view``, after URL resolution and before the view, so a
+    throttled login never reaches the authentication backend or password
+    hashing. Throttled requests get 429 with ``Retry-After``.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.rules = ratelimit.compile_rules(getattr(settings, 'RATE_LIMITS', {}))
+        self.store = ratelimit.get_store()
+        if self.is_async:
+            # Local buckets need no thread; shared-cache lookups get one
+            self.process_view = self.aprocess_view
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        rule = self.rules.get(request.resolver_match.view_name)
+        if rule is None:
+            return None
+        return self.throttled(ratelimit.check(self.store, rule, request, view_kwargs))
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        rule = self.rules.get(request.resolver_match.view_name)
+        if rule is None:
+            return None
+        if isinstance(self.store, ratelimit.LocalBucketStore) and not rule.account_field:
+            wait = ratelimit.check(self.store, rule, request, view_kwargs)
+        else:
+            # Reading POST data or a shared cache blocks
+            wait = await sync_to_async(ratelimit.check)(self.store, rule, request, view_kwargs)
+        return self.throttled(wait)
+
+    @staticmethod
+    def throttled(wait):
+        if not wait:
+            return None
+        seconds = max(1, math.ceil(wait))
+        response = HttpResponse(
+            f'Too many requests. Please try again in {seconds} seconds.',
+            status=429, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(seconds)
+        return response
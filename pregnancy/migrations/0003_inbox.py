@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_inbox(apps, schema_editor):
+    """Build inbox rows and unread totals for conversations that already exist."""
+    Conversation = apps.get_model('pregnancy', 'Conversation')
+    Message = apps.get_model('pregnancy', 'Message')
+    InboxEntry = apps.get_model('pregnancy', 'InboxEntry')
+    UserProfile = apps.get_model('pregnancy', 'UserProfile')
+    db = schema_editor.connection.alias
+
+    totals = {}
+    entries = []
+    for conversation in Conversation.objects.using(db).iterator():
+        last = Message.objects.using(db).filter(conversation=conversation).order_by('-created_at').first()
+        for participant_id in (conversation.patient_id, conversation.clinician_id):
+            unread = Message.objects.using(db).filter(
+                conversation=conversation, read_at__isnull=True,
+            ).exclude(sender_id=participant_id).count()
+            totals[participant_id] = totals.get(participant_id, 0) + unread
+            entries.append(InboxEntry(
+                participant_id=participant_id,
+                conversation=conversation,
+                last_activity_at=last.created_at if last else conversation.created_at,
+                last_message_preview=last.body[:140] if last else '',
+                unread_count=unread,
+            ))
+    InboxEntry.objects.using(db).bulk_create(entries, batch_size=500)
+    for user_id, unread in totals.items():
+        UserProfile.objects.using(db).filter(user_id=user_id).update(unread_message_count=unread)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0002_messaging'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='unread_message_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained by chat.send_message'),
+        ),
+        migrations.CreateModel(
+            name='InboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity_at', models.DateTimeField()),
+                ('last_message_preview', models.CharField(blank=True, max_length=140)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='pregnancy.conversation')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'inbox_entry',
+                'ordering': ['-last_activity_at', '-id'],
+                'indexes': [models.Index(fields=['participant', '-last_activity_at', '-id'], name='inbox_participant_activity')],
+                'constraints': [models.UniqueConstraint(fields=('participant', 'conversation'), name='unique_inbox_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
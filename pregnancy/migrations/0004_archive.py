@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:47
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0003_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('appointment_type', models.CharField(choices=[('prenatal', 'Prenatal Checkup'), ('ultrasound', 'Ultrasound'), ('lab_test', 'Lab Test'), ('consultation', 'Consultation'), ('other', 'Other')], default='prenatal', max_length=20)),
+                ('date_time', models.DateTimeField()),
+                ('location', models.CharField(max_length=200)),
+                ('healthcare_provider', models.CharField(max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('confirmed', 'Confirmed'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('no_show', 'No Show')], default='scheduled', max_length=15)),
+                ('duration', models.PositiveIntegerField(default=30, help_text='Duration in minutes')),
+                ('reminder_sent', models.BooleanField(default=False)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'appointment_archive',
+                'ordering': ['-date_time'],
+                'indexes': [models.Index(fields=['user', 'date_time'], name='appointment_user_id_3964b7_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedHealthMetric',
+            fields=[
+                ('date', models.DateField(default=datetime.date.today)),
+                ('weight', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('blood_pressure_systolic', models.PositiveIntegerField(blank=True, null=True)),
+                ('blood_pressure_diastolic', models.PositiveIntegerField(blank=True, null=True)),
+                ('fetal_heart_rate', models.PositiveIntegerField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_health_metrics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'health_metric_archive',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['user', 'date'], name='health_metr_user_id_cc67c1_idx')],
+            },
+        ),
+    ]
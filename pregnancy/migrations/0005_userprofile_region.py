@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0004_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='region',
+            field=models.CharField(blank=True, help_text='County, used for program reporting', max_length=50),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0005_userprofile_region'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'risk_watermark',
+            },
+        ),
+        migrations.CreateModel(
+            name='RiskFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(choices=[('severe_bp', 'Severe-range blood pressure'), ('sustained_bp', 'Sustained elevated blood pressure'), ('weight_gain', 'Rapid weight gain')], max_length=12)),
+                ('severity', models.PositiveSmallIntegerField(choices=[(1, 'Warning'), (2, 'Urgent')])),
+                ('observed_on', models.DateField()),
+                ('metric_id', models.BigIntegerField()),
+                ('value', models.CharField(max_length=40)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_flags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'risk_flag',
+                'ordering': ['-id'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'rule', 'observed_on'), name='unique_risk_flag')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_due_date_counts(apps, schema_editor):
+    """Count the patients already due per facility and day."""
+    UserProfile = apps.get_model('pregnancy', 'UserProfile')
+    DueDateCount = apps.get_model('pregnancy', 'DueDateCount')
+    db = schema_editor.connection.alias
+
+    rows = (
+        UserProfile.objects.using(db)
+        .filter(role='patient', due_date__isnull=False)
+        .order_by()
+        .values('facility', 'due_date')
+        .annotate(patients=Count('id'))
+    )
+    DueDateCount.objects.using(db).bulk_create([DueDateCount(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0006_risk_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DueDateCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facility', models.CharField(blank=True, max_length=100)),
+                ('due_date', models.DateField()),
+                ('patients', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'due_date_count',
+                'ordering': ['due_date', 'facility'],
+            },
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='facility',
+            field=models.CharField(blank=True, help_text='Planned place of delivery', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['facility', 'due_date'], name='user_profil_facilit_543966_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='duedatecount',
+            index=models.Index(fields=['due_date'], name='due_date_co_due_dat_81038a_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='duedatecount',
+            constraint=models.UniqueConstraint(fields=('facility', 'due_date'), name='unique_due_date_count'),
+        ),
+        migrations.RunPython(backfill_due_date_counts, migrations.RunPython.noop),
+    ]
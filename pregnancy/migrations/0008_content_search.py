@@ -0,0 +1,121 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:06
+
+from django.db import migrations, models
+
+# One FTS5 table per language on SQLite; English is stemmed
+SQLITE_TOKENIZERS = {
+    'en': 'porter unicode61 remove_diacritics 2',
+    'sw': 'unicode61 remove_diacritics 2',
+}
+
+POSTGRESQL_INDEX = [
+    """
+    CREATE TABLE content_search (
+        kind varchar(20) NOT NULL,
+        object_id bigint NOT NULL,
+        language varchar(2) NOT NULL,
+        config regconfig NOT NULL,
+        url varchar(500) NOT NULL,
+        title text NOT NULL,
+        body text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector(config, title), 'A') || setweight(to_tsvector(config, body), 'B')
+        ) STORED,
+        PRIMARY KEY (kind, object_id, language)
+    )
+    """,
+    'CREATE INDEX content_search_document ON content_search USING gin (document)',
+]
+
+# The cards that were hard-coded in resources.html
+RESOURCES = [
+    ('Understanding Early Pregnancy Symptoms', 'video', 'first', 'https://www.youtube.com/watch?v=y5CTeq7wrqY',
+     'Learn about common early pregnancy symptoms and when to contact your healthcare provider.'),
+    ('Baby Development: Weeks 13-27', 'video', 'second', 'https://www.youtube.com/watch?v=p1ACIrNXA3E',
+     'Watch how your baby grows and develops during the second trimester of pregnancy.'),
+    ('Essential Nutrition: First Trimester', 'article', 'first', 'https://www.healthline.com/health/pregnancy/first-trimester-diet',
+     'Key nutrients and dietary recommendations to support early fetal development and manage morning sickness.'),
+    ('Pregnancy Timeline: What to Expect', 'infographic', 'all', '',
+     'Visual guide showing key milestones and developments throughout your pregnancy journey.'),
+    ('Managing Morning Sickness: 5 Helpful Tips', 'tip', 'first', '',
+     'Simple strategies to alleviate nausea and maintain nutrition during early pregnancy.'),
+    ('Preparing for Labor: Your Complete Checklist', 'guide', 'third', '',
+     'Everything you need to know and prepare as you approach your due date.'),
+    ('Body Changes in the Second Trimester', 'article', 'second', '',
+     'What to expect as your body continues to change and your baby grows rapidly.'),
+    ('Breathing Techniques for Labor', 'video', 'third', 'https://www.youtube.com/watch?v=6J6YcCKPXy4',
+     'Learn effective breathing patterns to manage pain and stay calm during labor.'),
+    ('Best Sleep Positions During Pregnancy', 'tip', 'second', '',
+     'How to position yourself for comfortable and safe sleep as your belly grows.'),
+    ('Breastfeeding Basics: Getting Started', 'guide', 'postpartum', '',
+     'A comprehensive guide to establishing successful breastfeeding with your newborn.'),
+    ('Fetal Development: Week by Week', 'infographic', 'all', '',
+     "Visual timeline showing your baby's growth and development throughout pregnancy."),
+    ('Postpartum Recovery: What to Expect', 'article', 'postpartum', '',
+     'Understanding the physical and emotional changes after giving birth.'),
+    ('Complete Nutrition Guide for Second Trimester', 'article', 'second',
+     'https://www.healthline.com/health/pregnancy/second-trimester-diet-nutrition',
+     "Essential nutrients, meal planning, and foods to support your baby's development during this crucial growth period."),
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for language, tokenizer in SQLITE_TOKENIZERS.items():
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE content_search_{language} USING fts5('
+                f"kind UNINDEXED, object_id UNINDEXED, url UNINDEXED, title, body, tokenize='{tokenizer}')"
+            )
+    elif vendor == 'postgresql':
+        for statement in POSTGRESQL_INDEX:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for language in SQLITE_TOKENIZERS:
+            schema_editor.execute(f'DROP TABLE IF EXISTS content_search_{language}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP TABLE IF EXISTS content_search')
+
+
+def seed_resources(apps, schema_editor):
+    """Move the resources page cards into the table; indexed by rebuild_search_index."""
+    Resource = apps.get_model('pregnancy', 'Resource')
+    Resource.objects.using(schema_editor.connection.alias).bulk_create([
+        Resource(title=title, content_type=content_type, stage=stage, url=url, summary=summary)
+        for title, content_type, stage, url, summary in RESOURCES
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0007_due_date_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('content_type', models.CharField(choices=[('article', 'Article'), ('video', 'Video'), ('infographic', 'Infographic'), ('tip', 'Daily Tip'), ('guide', 'Guide')], default='article', max_length=12)),
+                ('stage', models.CharField(choices=[('all', 'All Trimesters'), ('first', 'First Trimester'), ('second', 'Second Trimester'), ('third', 'Third Trimester'), ('postpartum', 'Postpartum')], default='all', max_length=10)),
+                ('language', models.CharField(choices=[('en', 'English'), ('sw', 'Swahili')], default='en', max_length=2)),
+                ('url', models.URLField(blank=True)),
+                ('summary', models.TextField()),
+                ('body', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'resource',
+                'ordering': ['title'],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(seed_resources, migrations.RunPython.noop),
+    ]
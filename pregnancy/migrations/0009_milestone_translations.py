@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0008_content_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PregnancyMilestoneTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('sw', 'Swahili')], max_length=2)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('baby_size', models.CharField(blank=True, max_length=100)),
+                ('baby_weight', models.CharField(blank=True, max_length=50)),
+                ('baby_length', models.CharField(blank=True, max_length=50)),
+                ('key_developments', models.TextField(blank=True)),
+                ('maternal_changes', models.TextField(blank=True)),
+                ('health_tips', models.TextField(blank=True)),
+                ('milestone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='pregnancy.pregnancymilestone')),
+            ],
+            options={
+                'db_table': 'pregnancy_milestone_translation',
+                'ordering': ['milestone__week', 'language'],
+                'constraints': [models.UniqueConstraint(fields=('milestone', 'language'), name='unique_milestone_translation')],
+            },
+        ),
+    ]
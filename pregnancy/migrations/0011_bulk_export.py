@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0010_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_types', models.CharField(help_text='Comma-separated FHIR resource types', max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last sign of life from the runner', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'bulk_export_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BulkExportPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_type', models.CharField(max_length=20)),
+                ('source', models.CharField(help_text='Model label, e.g. pregnancy.HealthMetric', max_length=50)),
+                ('number', models.PositiveIntegerField()),
+                ('start_id', models.BigIntegerField()),
+                ('stop_id', models.BigIntegerField(blank=True, help_text='Exclusive; empty for the last range', null=True)),
+                ('resources', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partitions', to='pregnancy.bulkexportjob')),
+            ],
+            options={
+                'db_table': 'bulk_export_partition',
+                'ordering': ['job', 'resource_type', 'source', 'number'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bulkexportjob',
+            index=models.Index(fields=['status', 'created_at'], name='bulk_export_status_35d402_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bulkexportpartition',
+            constraint=models.UniqueConstraint(fields=('job', 'source', 'number'), name='unique_bulk_export_partition'),
+        ),
+    ]
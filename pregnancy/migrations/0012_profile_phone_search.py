@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:20
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_phone_normalized(apps, schema_editor):
+    """Digits-only copy of every phone number already stored."""
+    UserProfile = apps.get_model('pregnancy', 'UserProfile')
+    db = schema_editor.connection.alias
+
+    batch = []
+    for pk, phone_number in UserProfile.objects.using(db).exclude(phone_number='').values_list('pk', 'phone_number').iterator():
+        batch.append(UserProfile(pk=pk, phone_normalized=re.sub(r'\D', '', phone_number)))
+        if len(batch) == 1000:
+            UserProfile.objects.using(db).bulk_update(batch, ['phone_normalized'])
+            batch = []
+    UserProfile.objects.using(db).bulk_update(batch, ['phone_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0011_bulk_export'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Digits of phone_number, for admin search', max_length=20),
+        ),
+        migrations.RunPython(backfill_phone_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0012_profile_phone_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordAccessEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clinician_id', models.BigIntegerField()),
+                ('patient_id', models.BigIntegerField(help_text="The patient's user id")),
+                ('action', models.CharField(choices=[('view', 'Viewed record'), ('export', 'Exported record')], max_length=10)),
+                ('occurred_at', models.DateTimeField()),
+                ('path', models.CharField(max_length=200)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('request_id', models.CharField(blank=True, max_length=64)),
+            ],
+            options={
+                'db_table': 'record_access_event',
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['patient_id', 'occurred_at'], name='record_acce_patient_e3d7e7_idx'), models.Index(fields=['clinician_id', 'occurred_at'], name='record_acce_clinici_d836a3_idx')],
+            },
+        ),
+    ]
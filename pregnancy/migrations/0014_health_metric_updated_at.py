@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0013_record_access_audit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthmetric',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='archivedhealthmetric',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='healthmetric',
+            index=models.Index(fields=['updated_at', 'id'], name='health_metr_updated_03b7ca_idx'),
+        ),
+        migrations.AddField(
+            model_name='riskwatermark',
+            name='last_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:40
+
+from django.db import migrations
+
+# Serves the admin's case-insensitive username prefix search
+# (UPPER(username) LIKE UPPER('term%')). SQLite has no pattern opclass and
+# development databases are small, so it only gets the plain unique index.
+POSTGRESQL_INDEX = (
+    'CREATE INDEX IF NOT EXISTS pregnancy_user_username_upper_like '
+    'ON pregnancy_user (UPPER(username::text) text_pattern_ops)'
+)
+
+
+def create_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_INDEX)
+
+
+def drop_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS pregnancy_user_username_upper_like')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0014_health_metric_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:20
+
+from django.db import migrations
+
+# Serves the admin's case-insensitive email prefix search, the same way
+# 0015 does for usernames: User.clean lower-cases emails, but
+# create_user/createsuperuser and older rows may be mixed-case.
+POSTGRESQL_INDEX = (
+    'CREATE INDEX IF NOT EXISTS pregnancy_user_email_upper_like '
+    'ON pregnancy_user (UPPER(email::text) text_pattern_ops)'
+)
+
+
+def create_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_INDEX)
+
+
+def drop_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS pregnancy_user_email_upper_like')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pregnancy', '0015_username_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
@@ -0,0 +1,113 @@
+"""
+Per-language pregnancy milestone catalog.
+
+``manage.py compile_milestone_catalog`` runs at deploy time. For each
+language in ``LANGUAGES`` it merges PregnancyMilestone with its
+PregnancyMilestoneTranslation rows, using the English text for any field
+left blank, and writes ``MILESTONE_CATALOG_DIR/milestones.<language>.json``.
+Each process loads a language file once into read-only mappings, so
+``milestone(week)`` is a dictionary lookup for every language. Edits to
+milestones show up after the next compile and restart.
+
+Without a compiled file (e.g. in development) the catalog is built from
+the database on first use.
+"""
+
+import json
+import logging
+import os
+from types import MappingProxyType
+
+from django.conf import settings
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    'title', 'description', 'baby_size', 'baby_weight', 'baby_length',
+    'key_developments', 'maternal_changes', 'health_tips',
+)
+LIST_FIELDS = ('key_developments', 'health_tips')
+
+_catalogs = {}
+
+
+def languages():
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def language_for(code):
+    """Catalog language for a Django language code such as ``en-us``."""
+    code = (code or '').split('-')[0].lower()
+    return code if code in languages() else settings.LANGUAGE_CODE.split('-')[0]
+
+
+def catalog_path(language):
+    return os.path.join(settings.MILESTONE_CATALOG_DIR, f'milestones.{language}.json')
+
+
+def _lines(text):
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+def build(language):
+    """``{week: entry}`` for one language, read from the database."""
+    from .models import PregnancyMilestone, PregnancyMilestoneTranslation
+
+    translations = {
+        row.milestone_id: row for row in PregnancyMilestoneTranslation.objects.filter(language=language)
+    }
+    entries = {}
+    for milestone in PregnancyMilestone.objects.order_by('week'):
+        translated = translations.get(milestone.id)
+        entry = {'week': milestone.week, 'language': language if translated else 'en'}
+        for field in FIELDS:
+            entry[field] = (translated and getattr(translated, field)) or getattr(milestone, field)
+        for field in LIST_FIELDS:
+            entry[f'{field}_list'] = _lines(entry[field])
+        entries[milestone.week] = entry
+    return entries
+
+
+def compile_catalog(language):
+    """Write one language's catalog file atomically. Returns (path, milestones)."""
+    entries = build(language)
+    path = catalog_path(language)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'language': language, 'milestones': entries}, f, ensure_ascii=False, sort_keys=True)
+    os.replace(temp_path, path)
+    return path, len(entries)
+
+
+def _freeze(entries):
+    return MappingProxyType({
+        int(week): MappingProxyType({
+            key: tuple(value) if isinstance(value, list) else value for key, value in entry.items()
+        })
+        for week, entry in sorted(entries.items(), key=lambda item: int(item[0]))
+    })
+
+
+def catalog(language=None):
+    """Read-only ``{week: entry}`` for ``language`` (default: the active language)."""
+    language = language_for(language or translation.get_language())
+    entries = _catalogs.get(language)
+    if entries is None:
+        try:
+            with open(catalog_path(language), encoding='utf-8') as f:
+                entries = json.load(f)['milestones']
+        except FileNotFoundError:
+            logger.warning(f"No compiled milestone catalog for '{language}'; building it from the database")
+            entries = build(language)
+        entries = _catalogs.setdefault(language, _freeze(entries))
+    return entries
+
+
+def milestone(week, language=None):
+    return catalog(language).get(week)
+
+
+def milestones(language=None):
+    return list(catalog(language).values())
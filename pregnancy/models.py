@@ -1,11 +1,15 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from datetime import date, timedelta
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 import re
 
+from . import gestation
+
 # -------------------------------
 # Custom User
 # -------------------------------
@@ -40,6 +44,10 @@ class User(AbstractUser):
 # User Profile
 # -------------------------------
 
+def normalize_phone(value):
+    """Digits only, so '+254 712-345 678' and '254712345678' match the same prefix."""
+    return re.sub(r'\D', '', value or '')
+
 class UserProfileManager(models.Manager):
     def patients(self):
         return self.filter(role=UserProfile.Roles.PATIENT)
@@ -94,8 +102,11 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='userprofile')
     role = models.CharField(max_length=10, choices=Roles.choices, default=Roles.PATIENT)
     phone_number = models.CharField(max_length=20, blank=True, help_text='Format: +254 XXX XXX XXX')
+    phone_normalized = models.CharField(max_length=20, blank=True, editable=False, db_index=True, help_text='Digits of phone_number, for admin search')
     date_of_birth = models.DateField(null=True, blank=True)
     address = models.TextField(blank=True)
+    region = models.CharField(max_length=50, blank=True, help_text='County, used for program reporting')
+    facility = models.CharField(max_length=100, blank=True, help_text='Planned place of delivery')
     emergency_contact = models.CharField(max_length=100, blank=True)
     blood_type = models.CharField(max_length=10, choices=BLOOD_TYPES, blank=True, default='UNKNOWN')
     allergies = models.TextField(blank=True)
@@ -108,17 +119,28 @@ class UserProfile(models.Model):
     para = models.PositiveIntegerField(default=0, help_text='Number of live births')
     has_high_risk = models.BooleanField(default=False)
     primary_care_physician = models.CharField(max_length=100, blank=True)
+    unread_message_count = models.PositiveIntegerField(default=0, editable=False, help_text='Maintained by chat.send_message')
+    calendar_token = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False, help_text='Secret for the iCalendar feed URL')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     objects = UserProfileManager()
 
+    COUNTER_FIELDS = ('unread_message_count',)
+
+    TRIMESTERS = {
+        1: {'number': 1, 'name': 'First Trimester', 'message': 'Early development stage'},
+        2: {'number': 2, 'name': 'Second Trimester', 'message': 'Golden trimester - feeling better!'},
+        3: {'number': 3, 'name': 'Third Trimester', 'message': 'Final stretch - almost there!'},
+    }
+
     class Meta:
         db_table = 'user_profile'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['role', 'due_date']),
             models.Index(fields=['due_date']),
+            models.Index(fields=['facility', 'due_date']),
             models.Index(fields=['created_at']),
         ]
 
@@ -150,6 +172,16 @@ class UserProfile(models.Model):
             self.due_date = self.last_menstrual_period + timedelta(days=280)
         
         self.clean()
+        self.phone_normalized = normalize_phone(self.phone_number)
+        # Counters are maintained with F() updates elsewhere; never write back
+        # a stale in-memory value when the rest of the profile is saved.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        elif 'phone_number' in (kwargs.get('update_fields') or ()):
+            kwargs['update_fields'] = [*kwargs['update_fields'], 'phone_normalized']
         super().save(*args, **kwargs)
 
     def calculate_age(self):
@@ -159,60 +191,36 @@ class UserProfile(models.Model):
         return today.year - self.date_of_birth.year - ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
 
     def calculate_pregnancy_week(self):
-        """Calculate current pregnancy week with enhanced accuracy - FIXED VERSION"""
-        if not self.last_menstrual_period:
-            return None
-        
-        today = date.today()
-        lmp_date = self.last_menstrual_period
-        
-        if lmp_date > today:
-            return None
-        
-        days_pregnant = (today - lmp_date).days
-        if days_pregnant < 0:
-            return None
-        
-        week = (days_pregnant // 7) + 1
-        day = days_pregnant % 7
-        
-        return {
-            'week': min(week, 42), 
-            'day': day, 
-            'total_days': days_pregnant,
-            'weeks_completed': week - 1,
-            'days_in_current_week': day,
-            'estimated_due_date': lmp_date + timedelta(days=280)
-        }
+        """Current pregnancy week, day and due date; see ``pregnancy.gestation``."""
+        key = (self.last_menstrual_period, self.due_date, date.today())
+        cached = getattr(self, '_gestation', None)
+        if cached and cached[0] == key:
+            return cached[1]
+        # Kept on the instance like gestation.attach() does, so the trimester,
+        # progress and milestone helpers reuse one computation
+        data = gestation.week_data(*key)
+        self._gestation = (key, data)
+        return data
 
     def get_trimester(self):
         data = self.calculate_pregnancy_week()
         if not data:
             return None
-        week = data['week']
-        if week <= 13:
-            return {'number': 1, 'name': 'First Trimester', 'message': 'Early development stage'}
-        elif week <= 26:
-            return {'number': 2, 'name': 'Second Trimester', 'message': 'Golden trimester - feeling better!'}
-        else:
-            return {'number': 3, 'name': 'Third Trimester', 'message': 'Final stretch - almost there!'}
+        return self.TRIMESTERS[data['trimester']]
 
     def get_pregnancy_progress(self):
         data = self.calculate_pregnancy_week()
         if not data:
             return 0
-        return min(100, (data['week']/40)*100)
+        return data['progress']
 
     def get_current_milestone(self):
-        """Get the current pregnancy milestone"""
+        """This week's milestone in the active language, from the compiled catalog"""
+        from .milestone_catalog import milestone
         week_data = self.calculate_pregnancy_week()
         if not week_data:
             return None
-        
-        try:
-            return PregnancyMilestone.objects.get(week=week_data['week'])
-        except PregnancyMilestone.DoesNotExist:
-            return None
+        return milestone(week_data['week'])
 
     def get_upcoming_appointments(self, limit=5):
         """Get upcoming appointments"""
@@ -243,6 +251,13 @@ class UserProfile(models.Model):
     def is_patient(self):
         return self.role == self.Roles.PATIENT
 
+    @property
+    def due_calendar_key(self):
+        """The (facility, due_date) this profile is counted under in DueDateCount, if any."""
+        if self.role != self.Roles.PATIENT or not self.due_date:
+            return None
+        return self.facility, self.due_date
+
 # -------------------------------
 # Pregnancy Milestones
 # -------------------------------
@@ -271,11 +286,78 @@ class PregnancyMilestone(models.Model):
     def __str__(self):
         return f"Week {self.week}: {self.title}"
 
+class PregnancyMilestoneTranslation(models.Model):
+    """
+    A milestone's text in another language. Served from the catalog built
+    by ``manage.py compile_milestone_catalog``; fields left blank fall back
+    to the English text on the milestone.
+    """
+    milestone = models.ForeignKey(PregnancyMilestone, on_delete=models.CASCADE, related_name='translations')
+    language = models.CharField(max_length=2, choices=[('sw', 'Swahili')])
+    title = models.CharField(max_length=200, blank=True)
+    description = models.TextField(blank=True)
+    baby_size = models.CharField(max_length=100, blank=True)
+    baby_weight = models.CharField(max_length=50, blank=True)
+    baby_length = models.CharField(max_length=50, blank=True)
+    key_developments = models.TextField(blank=True)
+    maternal_changes = models.TextField(blank=True)
+    health_tips = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'pregnancy_milestone_translation'
+        ordering = ['milestone__week', 'language']
+        constraints = [
+            models.UniqueConstraint(fields=['milestone', 'language'], name='unique_milestone_translation'),
+        ]
+
+    def __str__(self):
+        return f"{self.milestone} ({self.language})"
+
+# -------------------------------
+# Educational Resources
+# -------------------------------
+
+class Resource(models.Model):
+    """An article, video or guide listed on the resources page and indexed by ``pregnancy.search``."""
+
+    class ContentTypes(models.TextChoices):
+        ARTICLE = 'article', 'Article'
+        VIDEO = 'video', 'Video'
+        INFOGRAPHIC = 'infographic', 'Infographic'
+        TIP = 'tip', 'Daily Tip'
+        GUIDE = 'guide', 'Guide'
+
+    class Stages(models.TextChoices):
+        ALL = 'all', 'All Trimesters'
+        FIRST = 'first', 'First Trimester'
+        SECOND = 'second', 'Second Trimester'
+        THIRD = 'third', 'Third Trimester'
+        POSTPARTUM = 'postpartum', 'Postpartum'
+
+    title = models.CharField(max_length=200)
+    content_type = models.CharField(max_length=12, choices=ContentTypes.choices, default=ContentTypes.ARTICLE)
+    stage = models.CharField(max_length=10, choices=Stages.choices, default=Stages.ALL)
+    language = models.CharField(max_length=2, choices=[('en', 'English'), ('sw', 'Swahili')], default='en')
+    url = models.URLField(blank=True)
+    summary = models.TextField()
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'resource'
+        ordering = ['title']
+
+    def __str__(self):
+        return self.title
+
 # -------------------------------
 # Appointments
 # -------------------------------
 
-class Appointment(models.Model):
+class AppointmentFields(models.Model):
+    """Columns shared by the live appointment table and its archive."""
+
     class AppointmentType(models.TextChoices):
         PRENATAL = 'prenatal', 'Prenatal Checkup'
         ULTRASOUND = 'ultrasound', 'Ultrasound'
@@ -291,8 +373,8 @@ class Appointment(models.Model):
         ('cancelled', 'Cancelled'),
         ('no_show', 'No Show'),
     ]
+    FINAL_STATUSES = ('completed', 'cancelled', 'no_show')
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='appointments')
     appointment_type = models.CharField(max_length=20, choices=AppointmentType.choices, default=AppointmentType.PRENATAL)
     date_time = models.DateTimeField()
     location = models.CharField(max_length=200)
@@ -303,14 +385,12 @@ class Appointment(models.Model):
     duration = models.PositiveIntegerField(default=30, help_text='Duration in minutes')
     reminder_sent = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    is_archived = False
 
     class Meta:
-        db_table = 'appointment'
-        ordering = ['-date_time']
-        indexes = [
-            models.Index(fields=['user', 'date_time']),
-            models.Index(fields=['date_time', 'is_completed']),
-        ]
+        abstract = True
 
     def is_upcoming(self):
         from django.utils import timezone
@@ -323,31 +403,399 @@ class Appointment(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.get_appointment_type_display()} - {self.date_time}"
 
+
+class Appointment(AppointmentFields):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='appointments')
+
+    class Meta:
+        db_table = 'appointment'
+        ordering = ['-date_time']
+        indexes = [
+            models.Index(fields=['user', 'date_time']),
+            models.Index(fields=['date_time', 'is_completed']),
+        ]
+
+
+class ArchivedAppointment(AppointmentFields):
+    """Past appointments moved out of the live table by ``archive_records``; ids are kept."""
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_appointments')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        db_table = 'appointment_archive'
+        ordering = ['-date_time']
+        indexes = [
+            models.Index(fields=['user', 'date_time']),
+        ]
+
 # -------------------------------
 # Health Metrics
 # -------------------------------
 
-class HealthMetric(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='health_metrics')
+class HealthMetricFields(models.Model):
+    """Columns shared by the live health metric table and its archive."""
+
     date = models.DateField(default=date.today)
     weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     blood_pressure_systolic = models.PositiveIntegerField(null=True, blank=True)
     blood_pressure_diastolic = models.PositiveIntegerField(null=True, blank=True)
     fetal_heart_rate = models.PositiveIntegerField(null=True, blank=True)
     notes = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    is_archived = False
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+
+class HealthMetric(HealthMetricFields):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='health_metrics')
 
     class Meta:
         db_table = 'health_metric'
         ordering = ['-date']
         unique_together = ['user', 'date']
+        indexes = [
+            # Incremental risk scoring walks (updated_at, id)
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
+
+class ArchivedHealthMetric(HealthMetricFields):
+    """Metrics from finished pregnancies moved out by ``archive_records``; ids are kept."""
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_health_metrics')
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        db_table = 'health_metric_archive'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+
+# -------------------------------
+# Messaging
+# -------------------------------
+
+class ConversationQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(models.Q(patient=user) | models.Q(clinician=user))
+
+class Conversation(models.Model):
+    patient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='patient_conversations')
+    clinician = models.ForeignKey(User, on_delete=models.CASCADE, related_name='clinician_conversations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ConversationQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'conversation'
+        ordering = ['-last_message_at']
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'clinician'], name='unique_conversation_pair'),
+        ]
+
+    @property
+    def group_name(self):
+        """Channel layer group that every open socket on this conversation joins"""
+        return f'conversation_{self.pk}'
+
+    def has_participant(self, user):
+        return user.pk in (self.patient_id, self.clinician_id)
+
+    def other_participant(self, user):
+        return self.clinician if user.pk == self.patient_id else self.patient
 
     def __str__(self):
-        return f"{self.user.username} - {self.date}"
+        return f"{self.patient.username} <-> {self.clinician.username}"
+
+class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'message'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at']),
+        ]
+
+    def to_dict(self):
+        return {
+            'id': self.pk,
+            'conversation': self.conversation_id,
+            'sender': self.sender_id,
+            'body': self.body,
+            'created_at': self.created_at.isoformat(),
+        }
+
+    def __str__(self):
+        return f"{self.sender.username}: {self.body[:40]}"
+
+class InboxEntry(models.Model):
+    """
+    One row per (participant, conversation), kept up to date by the message
+    write path so the inbox and unread badges never count over Message.
+    """
+    participant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inbox_entries')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='inbox_entries')
+    last_activity_at = models.DateTimeField()
+    last_message_preview = models.CharField(max_length=140, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'inbox_entry'
+        ordering = ['-last_activity_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['participant', 'conversation'], name='unique_inbox_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['participant', '-last_activity_at', '-id'], name='inbox_participant_activity'),
+        ]
+
+    def __str__(self):
+        return f"{self.participant.username} - conversation {self.conversation_id} ({self.unread_count} unread)"
+
+# -------------------------------
+# Risk Flags
+# -------------------------------
+
+class RiskFlag(models.Model):
+    """A dangerous pattern found in a patient's health metrics by ``pregnancy.risk``."""
+
+    class Rule(models.TextChoices):
+        SEVERE_BP = 'severe_bp', 'Severe-range blood pressure'
+        SUSTAINED_BP = 'sustained_bp', 'Sustained elevated blood pressure'
+        RAPID_WEIGHT_GAIN = 'weight_gain', 'Rapid weight gain'
+
+    class Severity(models.IntegerChoices):
+        WARNING = 1, 'Warning'
+        URGENT = 2, 'Urgent'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='risk_flags')
+    rule = models.CharField(max_length=12, choices=Rule.choices)
+    severity = models.PositiveSmallIntegerField(choices=Severity.choices)
+    observed_on = models.DateField()
+    # Plain id, not a foreign key, so archiving metrics keeps the flag
+    metric_id = models.BigIntegerField()
+    value = models.CharField(max_length=40)
+    created_at = models.DateTimeField(auto_now_add=True)
+    acknowledged_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'risk_flag'
+        ordering = ['-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rule', 'observed_on'], name='unique_risk_flag'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_rule_display()} on {self.observed_on} ({self.value})"
+
+
+class RiskWatermark(models.Model):
+    """Last HealthMetric (updated_at, id) each scoring pipeline has processed."""
+
+    name = models.CharField(max_length=50, unique=True)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'risk_watermark'
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_updated_at} #{self.last_id}"
+
+# -------------------------------
+# Due Date Calendar
+# -------------------------------
+
+class DueDateCount(models.Model):
+    """
+    Patients due per facility and day, kept current by the UserProfile
+    signals below so capacity views read one row per day instead of
+    scanning profiles. ``manage.py rebuild_due_calendar`` recounts it.
+    """
+    facility = models.CharField(max_length=100, blank=True)
+    due_date = models.DateField()
+    patients = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'due_date_count'
+        ordering = ['due_date', 'facility']
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'due_date'], name='unique_due_date_count'),
+        ]
+        indexes = [
+            models.Index(fields=['due_date']),
+        ]
+
+    @classmethod
+    def adjust(cls, key, delta):
+        if key is None:
+            return
+        facility, due_date = key
+        if delta > 0:
+            cls.objects.get_or_create(facility=facility, due_date=due_date)
+        cls.objects.filter(facility=facility, due_date=due_date).update(
+            patients=Greatest(F('patients') + delta, 0)
+        )
+
+    def __str__(self):
+        return f"{self.due_date} {self.facility or 'No facility'}: {self.patients}"
+
+# -------------------------------
+# Bulk Export
+# -------------------------------
+
+class BulkExportJob(models.Model):
+    """
+    A FHIR bulk data export, run by ``manage.py run_bulk_exports``; see
+    ``pregnancy.bulk_export``.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='bulk_export_jobs')
+    resource_types = models.CharField(max_length=100, help_text='Comma-separated FHIR resource types')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text='Last sign of life from the runner')
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'bulk_export_job'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    @property
+    def types(self):
+        return [name for name in self.resource_types.split(',') if name]
+
+    def __str__(self):
+        return f"Bulk export {self.pk} ({self.status})"
+
+
+class BulkExportPartition(models.Model):
+    """One id range of one source table, written to its own NDJSON file."""
+
+    job = models.ForeignKey(BulkExportJob, on_delete=models.CASCADE, related_name='partitions')
+    resource_type = models.CharField(max_length=20)
+    source = models.CharField(max_length=50, help_text='Model label, e.g. pregnancy.HealthMetric')
+    number = models.PositiveIntegerField()
+    start_id = models.BigIntegerField()
+    stop_id = models.BigIntegerField(null=True, blank=True, help_text='Exclusive; empty for the last range')
+    resources = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'bulk_export_partition'
+        ordering = ['job', 'resource_type', 'source', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'source', 'number'], name='unique_bulk_export_partition'),
+        ]
+
+    @property
+    def filename(self):
+        return f"{self.resource_type}.{self.source.rsplit('.', 1)[-1].lower()}.{self.number:05d}.ndjson"
+
+    def __str__(self):
+        return f"{self.job_id}/{self.filename}"
+
+# -------------------------------
+# Audit
+# -------------------------------
+
+class RecordAccessEvent(models.Model):
+    """
+    One clinician access to a patient's record. Written in batches by
+    ``pregnancy.audit``; rows are never changed or deleted through the ORM.
+    """
+    class Action(models.TextChoices):
+        VIEW = 'view', 'Viewed record'
+        EXPORT = 'export', 'Exported record'
+
+    # Plain ids, not foreign keys, so the trail outlives deleted accounts
+    clinician_id = models.BigIntegerField()
+    patient_id = models.BigIntegerField(help_text="The patient's user id")
+    action = models.CharField(max_length=10, choices=Action.choices)
+    occurred_at = models.DateTimeField()
+    path = models.CharField(max_length=200)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    request_id = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        db_table = 'record_access_event'
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['patient_id', 'occurred_at']),
+            models.Index(fields=['clinician_id', 'occurred_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError('Record access events cannot be changed.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError('Record access events cannot be deleted.')
+
+    def __str__(self):
+        return f"{self.occurred_at}: user {self.clinician_id} {self.action} patient {self.patient_id}"
 
 # -------------------------------
 # Signals
 # -------------------------------
 
+@receiver(pre_save, sender=UserProfile)
+def remember_due_calendar_key(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_due_calendar_key = None
+        return
+    previous = sender.objects.filter(pk=instance.pk).values('role', 'facility', 'due_date').first()
+    instance._previous_due_calendar_key = sender(**previous).due_calendar_key if previous else None
+
+@receiver(post_save, sender=UserProfile)
+def update_due_date_counts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous, current = getattr(instance, '_previous_due_calendar_key', None), instance.due_calendar_key
+    if previous != current:
+        with transaction.atomic():
+            DueDateCount.adjust(previous, -1)
+            DueDateCount.adjust(current, 1)
+
+@receiver(post_delete, sender=UserProfile)
+def release_due_date_count(sender, instance, **kwargs):
+    DueDateCount.adjust(instance.due_calendar_key, -1)
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
@@ -0,0 +1,188 @@
+"""
+Token-bucket rate limits for login, signup and other abuse-prone URLs.
+
+``settings.RATE_LIMITS`` maps URL names to rules; a tuple of names shares
+one rule and one set of buckets (the same view under two URLs)::
+
+    'login': {
+        'methods': ['POST'],       # optional; default every method
+        'ip': '20/min',            # bucket per client IP
+        'account': '5/5min',       # bucket per account named in the request
+        'account_field': 'username',   # POST field ...
+        # 'account_kwarg': 'uidb64',   # ... or URL kwarg holding the account
+    }
+
+A rate ``N/period`` is a bucket of N tokens refilled evenly over the
+period, so bursts up to N are allowed and the sustained rate is N per
+period. Periods are ``s``, ``min``, ``h`` or ``d``, optionally with a
+count (``5min``).
+
+Clients are told apart by ``REMOTE_ADDR``. Behind reverse proxies that
+is the proxy's address, which would put every client in one IP bucket:
+set ``RATE_LIMIT_PROXY_COUNT`` to the number of trusted proxies in front
+of the app, and the client address is read from the ``X-Forwarded-For``
+entry the outermost of them appended. Never set it higher than the real
+number of proxies, or clients can pick their own address.
+
+Buckets live in process memory by default (``RATE_LIMIT_STORE = 'local'``):
+a dictionary lookup under a lock, no I/O. With ``'cache'`` they are kept in
+``RATE_LIMIT_CACHE`` so every worker shares them; the read-modify-write is
+not atomic, so concurrent requests can occasionally both take the last
+token.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+_RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(s|sec|second|m|min|minute|h|hour|d|day)s?\s*$')
+_PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+# Buckets kept per process; past this the least recently used tenth is dropped
+LOCAL_MAX_BUCKETS = 100_000
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: int
+    period: float
+
+    @property
+    def refill_per_second(self):
+        return self.capacity / self.period
+
+
+def parse_rate(value):
+    match = _RATE_RE.match(value or '')
+    if not match:
+        raise ValueError(f"Invalid rate '{value}'; use e.g. '10/min' or '5/15min'")
+    count, multiplier, unit = match.groups()
+    return Rate(int(count), int(multiplier or 1) * _PERIODS[unit])
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory."""
+
+    def __init__(self, max_buckets=LOCAL_MAX_BUCKETS):
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.max_buckets = max_buckets
+
+    def take(self, key, rate, now=None):
+        """Take one token. Returns 0 if allowed, otherwise seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            # Popped and re-inserted so the dict stays in least-recently-used order
+            tokens, updated = self.buckets.pop(key, (rate.capacity, now))
+            tokens = min(rate.capacity, tokens + (now - updated) * rate.refill_per_second)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                if len(self.buckets) > self.max_buckets:
+                    self._forget_oldest()
+                return 0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / rate.refill_per_second
+
+    def _forget_oldest(self):
+        for key in list(self.buckets)[:len(self.buckets) // 10]:
+            del self.buckets[key]
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache shared by every worker."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, rate, now=None):
+        cache = caches[self.alias]
+        now = time.time() if now is None else now
+        tokens, updated = cache.get(key) or (rate.capacity, now)
+        tokens = min(rate.capacity, tokens + (now - updated) * rate.refill_per_second)
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate.refill_per_second
+        cache.set(key, (tokens - 1 if not wait else tokens, now), timeout=int(rate.period) + 1)
+        return wait
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+@dataclass(frozen=True)
+class Rule:
+    bucket: str
+    methods: frozenset
+    ip: Rate = None
+    account: Rate = None
+    account_field: str = None
+    account_kwarg: str = None
+
+
+def compile_rules(config):
+    """``{url name: Rule}`` from ``settings.RATE_LIMITS``."""
+    rules = {}
+    for names, options in config.items():
+        names = (names,) if isinstance(names, str) else tuple(names)
+        rule = Rule(
+            bucket=names[0],
+            methods=frozenset(method.upper() for method in options.get('methods') or ()),
+            ip=parse_rate(options['ip']) if options.get('ip') else None,
+            account=parse_rate(options['account']) if options.get('account') else None,
+            account_field=options.get('account_field'),
+            account_kwarg=options.get('account_kwarg'),
+        )
+        rules.update(dict.fromkeys(names, rule))
+    return rules
+
+
+def get_store():
+    if getattr(settings, 'RATE_LIMIT_STORE', 'local') == 'cache':
+        return CacheBucketStore(getattr(settings, 'RATE_LIMIT_CACHE', 'default'))
+    return LocalBucketStore()
+
+
+def client_ip(request):
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _account(request, rule, view_kwargs):
+    if rule.account_kwarg:
+        value = view_kwargs.get(rule.account_kwarg)
+    elif rule.account_field:
+        value = request.POST.get(rule.account_field)
+    else:
+        return None
+    value = (value or '').strip().lower()
+    # Keys stay short and printable whatever was submitted
+    return hashlib.sha256(value.encode()).hexdigest()[:32] if value else None
+
+
+def check(store, rule, request, view_kwargs):
+    """
+    Take a token from each bucket the rule names for this request. Returns
+    0 if allowed, otherwise the seconds to wait (the longest of the buckets
+    that ran out).
+    """
+    if rule.methods and request.method not in rule.methods:
+        return 0
+    wait = 0
+    if rule.ip:
+        wait = max(wait, store.take(f'ratelimit:{rule.bucket}:ip:{client_ip(request)}', rule.ip))
+    if rule.account:
+        account = _account(request, rule, view_kwargs)
+        if account:
+            wait = max(wait, store.take(f'ratelimit:{rule.bucket}:account:{account}', rule.account))
+    return wait
@@ -0,0 +1,141 @@
+"""
+Full patient record export for referrals.
+
+``ndjson(profile)`` yields the patient's profile as the first line, then
+every appointment and health metric, live and archived, oldest first as
+one timeline. Each of the four tables is read with its own chunked cursor
+in ``(user, date)`` index order and the cursors are merged on the fly, so
+output starts with the first rows and memory stays flat however long the
+history is. ``zip_bundle(profile)`` deflates the same stream into a zip
+archive that is itself streamed (no seeking; sizes go in data
+descriptors).
+"""
+
+import heapq
+import json
+import zipfile
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Appointment, ArchivedAppointment, ArchivedHealthMetric, HealthMetric
+
+CHUNK_SIZE = 500
+
+APPOINTMENT = 'appointment'
+HEALTH_METRIC = 'health_metric'
+
+# Left out of every exported record
+PRIVATE_FIELDS = {'user_id', 'calendar_token', 'unread_message_count'}
+
+_encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+def _fields(obj):
+    return {
+        field.attname: getattr(obj, field.attname)
+        for field in obj._meta.concrete_fields if field.attname not in PRIVATE_FIELDS
+    }
+
+
+def record(obj, record_type):
+    return {'type': record_type, 'archived': obj.is_archived, **_fields(obj)}
+
+
+def profile_record(profile):
+    data = {'type': 'profile', **_fields(profile)}
+    data.update(
+        username=profile.user.username,
+        full_name=profile.full_name,
+        email=profile.email,
+        exported_at=timezone.now(),
+    )
+    return data
+
+
+def _appointment_key(appointment):
+    return timezone.localtime(appointment.date_time).replace(tzinfo=None)
+
+
+def _metric_key(metric):
+    return datetime.combine(metric.date, time.min)
+
+
+def sources(user):
+    """``(key, record type, index-ordered queryset)`` for each table in the record."""
+    return [
+        (_appointment_key, APPOINTMENT, Appointment.objects.filter(user=user).order_by('date_time', 'id')),
+        (_appointment_key, APPOINTMENT, ArchivedAppointment.objects.filter(user=user).order_by('date_time', 'id')),
+        (_metric_key, HEALTH_METRIC, HealthMetric.objects.filter(user=user).order_by('date', 'id')),
+        (_metric_key, HEALTH_METRIC, ArchivedHealthMetric.objects.filter(user=user).order_by('date', 'id')),
+    ]
+
+
+async def timeline(user):
+    """Every record of ``user`` as one date-ordered stream, like ``heapq.merge`` over async cursors."""
+    heap = []
+    for position, (key, record_type, queryset) in enumerate(sources(user)):
+        rows = aiter(queryset.aiterator(chunk_size=CHUNK_SIZE))
+        first = await anext(rows, None)
+        if first is not None:
+            heap.append((key(first), position, first, rows, key, record_type))
+    heapq.heapify(heap)
+    while heap:
+        _, position, obj, rows, key, record_type = heap[0]
+        yield record(obj, record_type)
+        following = await anext(rows, None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            # Ties keep source order, so live rows come before archived ones
+            heapq.heapreplace(heap, (key(following), position, following, rows, key, record_type))
+
+
+def _line(data):
+    return _encoder.encode(data) + '\n'
+
+
+async def ndjson(profile):
+    # The profile goes out on its own so the download starts at once
+    yield _line(profile_record(profile))
+    lines = []
+    async for data in timeline(profile.user):
+        lines.append(_line(data))
+        if len(lines) == CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+class _Sink:
+    """Write-only file for ZipFile; hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+async def zip_bundle(profile):
+    """``profile.json`` and ``timeline.ndjson`` in a streamed zip archive."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr('profile.json', json.dumps(profile_record(profile), cls=DjangoJSONEncoder, indent=2))
+        yield sink.drain()
+        with bundle.open('timeline.ndjson', 'w', force_zip64=True) as entry:
+            async for data in timeline(profile.user):
+                entry.write(_line(data).encode('utf-8'))
+                if sink.chunks:
+                    yield sink.drain()
+    yield sink.drain()
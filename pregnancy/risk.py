@@ -0,0 +1,194 @@
+"""
+Incremental hypertension / preeclampsia risk scoring over HealthMetric.
+
+``score_new_metrics()`` picks up metrics saved (created or edited) after
+the stored ``(updated_at, id)`` watermark, in batches in that order. It
+stops ``COMMIT_LAG`` short of the present, so a transaction that commits
+after a later one has already been scored is still picked up on the next
+run instead of falling behind the watermark. For each batch it loads, in
+one query, every reading of the affected users within ``WINDOW_DAYS`` of
+the new readings, evaluates the rules per user and writes ``RiskFlag``
+rows with ``bulk_create(ignore_conflicts=True)`` so a reading is never
+flagged twice for the same rule and day. ``backfill()`` runs the same
+evaluation over id ranges in a process pool.
+
+Rules (on the new reading, against neighbouring readings of the same user):
+  * severe_bp:    systolic >= 160 or diastolic >= 110
+  * sustained_bp: >= 140/90, and another >= 140/90 within WINDOW_DAYS
+  * weight_gain:  >= WEIGHT_GAIN_KG more than a reading up to WINDOW_DAYS earlier
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from .models import HealthMetric, RiskFlag, RiskWatermark
+
+WATERMARK = 'health_metric'
+BATCH_SIZE = 2000
+WINDOW_DAYS = 7
+ELEVATED = (140, 90)
+SEVERE = (160, 110)
+WEIGHT_GAIN_KG = Decimal('2.0')
+# Longest a metric save is expected to take to commit; newer rows wait for the next run
+COMMIT_LAG = timedelta(minutes=2)
+
+READING_FIELDS = (
+    'id', 'user_id', 'date', 'weight', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'updated_at',
+)
+
+
+def _at_least(reading, threshold):
+    systolic, diastolic = reading['blood_pressure_systolic'], reading['blood_pressure_diastolic']
+    return (systolic or 0) >= threshold[0] or (diastolic or 0) >= threshold[1]
+
+
+def _bp(reading):
+    return f"{reading['blood_pressure_systolic'] or '-'}/{reading['blood_pressure_diastolic'] or '-'}"
+
+
+def evaluate(reading, neighbours):
+    """Yield ``(rule, severity, value)`` for each rule one reading triggers, given the user's nearby readings."""
+    window = timedelta(days=WINDOW_DAYS)
+
+    if _at_least(reading, SEVERE):
+        yield RiskFlag.Rule.SEVERE_BP, RiskFlag.Severity.URGENT, _bp(reading)
+    elif _at_least(reading, ELEVATED) and any(
+        other['id'] != reading['id'] and abs(other['date'] - reading['date']) <= window and _at_least(other, ELEVATED)
+        for other in neighbours
+    ):
+        yield RiskFlag.Rule.SUSTAINED_BP, RiskFlag.Severity.WARNING, _bp(reading)
+
+    if reading['weight'] is not None:
+        earlier = [
+            other['weight'] for other in neighbours
+            if other['weight'] is not None and timedelta(0) < reading['date'] - other['date'] <= window
+        ]
+        if earlier and reading['weight'] - min(earlier) >= WEIGHT_GAIN_KG:
+            gain = reading['weight'] - min(earlier)
+            yield RiskFlag.Rule.RAPID_WEIGHT_GAIN, RiskFlag.Severity.WARNING, f'+{gain} kg in {WINDOW_DAYS} days'
+
+
+def score_readings(readings):
+    """
+    Evaluate ``readings`` (dicts of READING_FIELDS) and store their flags.
+    Returns the number of flags inserted; ones that already exist are skipped.
+    """
+    if not readings:
+        return 0
+    window = timedelta(days=WINDOW_DAYS)
+    users = {reading['user_id'] for reading in readings}
+    first = min(reading['date'] for reading in readings) - window
+    last = max(reading['date'] for reading in readings) + window
+
+    neighbours = defaultdict(list)
+    for other in HealthMetric.objects.filter(user_id__in=users, date__range=(first, last)).order_by().values(*READING_FIELDS):
+        neighbours[other['user_id']].append(other)
+
+    flags = [
+        RiskFlag(
+            user_id=reading['user_id'], rule=rule, severity=severity,
+            observed_on=reading['date'], metric_id=reading['id'], value=value,
+        )
+        for reading in readings
+        for rule, severity, value in evaluate(reading, neighbours[reading['user_id']])
+    ]
+    if not flags:
+        return 0
+    # The unique (user, rule, observed_on) constraint makes re-runs idempotent.
+    # ignore_conflicts hands back every object, so count the rows instead.
+    metric_ids = {flag.metric_id for flag in flags}
+    before = RiskFlag.objects.filter(metric_id__in=metric_ids).count()
+    RiskFlag.objects.bulk_create(flags, ignore_conflicts=True)
+    return RiskFlag.objects.filter(metric_id__in=metric_ids).count() - before
+
+
+def score_metric(metric):
+    """
+    Score one just-saved metric inline, ahead of the batch job, and return
+    the flags it raised (with ids) so they can be pushed to clinicians.
+    """
+    readings = list(HealthMetric.objects.filter(pk=metric.pk).values(*READING_FIELDS))
+    # An edited metric may already have flags; only new ones are returned
+    existing = list(RiskFlag.objects.filter(metric_id=metric.pk).values_list('pk', flat=True))
+    if not score_readings(readings):
+        return []
+    # ignore_conflicts leaves pks unset, so read the new rows back
+    return list(RiskFlag.objects.filter(metric_id=metric.pk).exclude(pk__in=existing))
+
+
+def score_new_metrics(batch_size=BATCH_SIZE, limit=None):
+    """
+    Score every metric saved after the watermark and more than COMMIT_LAG
+    ago, one batch per transaction. Concurrent runs serialize on the
+    watermark row. Returns (metrics, flags inserted).
+    """
+    RiskWatermark.objects.get_or_create(name=WATERMARK)
+    settled = timezone.now() - COMMIT_LAG
+    processed = flagged = 0
+    while limit is None or processed < limit:
+        with transaction.atomic():
+            watermark = RiskWatermark.objects.select_for_update().get(name=WATERMARK)
+            pending = HealthMetric.objects.filter(updated_at__lt=settled)
+            if watermark.last_updated_at is not None:
+                pending = pending.filter(
+                    Q(updated_at__gt=watermark.last_updated_at)
+                    | Q(updated_at=watermark.last_updated_at, id__gt=watermark.last_id)
+                )
+            readings = list(pending.order_by('updated_at', 'id').values(*READING_FIELDS)[:batch_size])
+            if not readings:
+                break
+            flagged += score_readings(readings)
+            watermark.last_updated_at, watermark.last_id = readings[-1]['updated_at'], readings[-1]['id']
+            watermark.save(update_fields=['last_updated_at', 'last_id', 'updated_at'])
+        processed += len(readings)
+    return processed, flagged
+
+
+def _score_range(bounds):
+    start, stop = bounds
+    try:
+        readings = list(
+            HealthMetric.objects.filter(id__gte=start, id__lt=stop).order_by('id').values(*READING_FIELDS)
+        )
+        with transaction.atomic():
+            return len(readings), score_readings(readings)
+    finally:
+        connections.close_all()
+
+
+def backfill(chunk_size=50_000, workers=None, progress=None):
+    """
+    Score all existing metrics in id-range chunks across a process pool,
+    then move the watermark up to the start of the run, less COMMIT_LAG;
+    metrics saved since are left to score_new_metrics(). Flags already
+    present are skipped.
+    """
+    started = timezone.now()
+    bounds = HealthMetric.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return 0, 0
+    ranges = [(start, start + chunk_size) for start in range(bounds['first'], bounds['last'] + 1, chunk_size)]
+
+    # Children must open their own connections
+    connections.close_all()
+    processed = flagged = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for readings, flags in pool.map(_score_range, ranges):
+            processed += readings
+            flagged += flags
+            if progress:
+                progress(processed, flagged)
+
+    resume_from = started - COMMIT_LAG
+    with transaction.atomic():
+        watermark, _ = RiskWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        if watermark.last_updated_at is None or watermark.last_updated_at < resume_from:
+            watermark.last_updated_at, watermark.last_id = resume_from, 0
+            watermark.save(update_fields=['last_updated_at', 'last_id', 'updated_at'])
+    return processed, flagged
@@ -0,0 +1,178 @@
+"""
+Full-text search over milestone and resource content.
+
+Every milestone and resource is stored as one document per language in a
+prebuilt inverted index, created by migration 0008:
+
+  * SQLite: one FTS5 table per language, ``content_search_<language>``.
+    English uses the porter stemmer, so "kicks" matches "kick".
+  * PostgreSQL: one ``content_search`` table with a stored, GIN-indexed
+    ``tsvector``. It uses the ``english`` text search config, or ``simple``
+    for Swahili, which has no stemmer.
+
+Documents are rewritten by the signals in ``pregnancy.signals`` whenever a
+milestone or resource is saved or deleted. ``rebuild()`` (``manage.py
+rebuild_search_index``) reindexes everything. Results are ranked (bm25 /
+ts_rank_cd) and carry an HTML snippet with the matched terms in
+``<mark>``. On other database vendors search returns no results.
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+LANGUAGES = ('en', 'sw')
+DEFAULT_LANGUAGE = 'en'
+PG_CONFIGS = {'en': 'english', 'sw': 'simple'}
+RESULT_LIMIT = 20
+SNIPPET_WORDS = 16
+
+# Unlikely to appear in content; swapped for <mark> after escaping the snippet
+_START, _STOP = '\ue000', '\ue001'
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+KIND_MILESTONE = 'milestone'
+KIND_RESOURCE = 'resource'
+# SQLite documents use rowid = object id * len(KINDS) + kind position
+KINDS = (KIND_MILESTONE, KIND_RESOURCE)
+MODEL_KINDS = {'pregnancymilestone': KIND_MILESTONE, 'resource': KIND_RESOURCE}
+
+
+def supported():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def language_for(code):
+    """Index language for a Django language code such as ``en-us``."""
+    code = (code or '').split('-')[0].lower()
+    return code if code in LANGUAGES else DEFAULT_LANGUAGE
+
+
+def documents(obj):
+    """``(language, kind, object id, url, title, body)`` for each document indexed for ``obj``."""
+    kind = MODEL_KINDS[obj._meta.model_name]
+    if kind == KIND_MILESTONE:
+        body = '\n'.join([obj.description, obj.key_developments, obj.maternal_changes, obj.health_tips])
+        url = reverse('milestone_detail', args=[obj.week])
+        yield 'en', kind, obj.pk, url, f'Week {obj.week}: {obj.title}', body
+        for translation in obj.translations.all():
+            fields = [translation.description, translation.key_developments, translation.maternal_changes, translation.health_tips]
+            if any(fields):
+                title = f'Week {obj.week}: {translation.title or obj.title}'
+                yield translation.language, kind, obj.pk, url, title, '\n'.join(fields)
+    else:
+        url = obj.url or reverse('resources')
+        yield obj.language, kind, obj.pk, url, obj.title, f'{obj.summary}\n{obj.body}'
+
+
+def _rowid(kind, object_id):
+    return object_id * len(KINDS) + KINDS.index(kind)
+
+
+def unindex(kind, object_id):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for language in LANGUAGES:
+                cursor.execute(f'DELETE FROM content_search_{language} WHERE rowid = %s', [_rowid(kind, object_id)])
+        else:
+            cursor.execute('DELETE FROM content_search WHERE kind = %s AND object_id = %s', [kind, object_id])
+
+
+def index(obj):
+    """Replace the documents for one milestone or resource."""
+    if not supported():
+        return
+    with transaction.atomic():
+        unindex(MODEL_KINDS[obj._meta.model_name], obj.pk)
+        with connection.cursor() as cursor:
+            for language, kind, object_id, url, title, body in documents(obj):
+                if connection.vendor == 'sqlite':
+                    cursor.execute(
+                        f'INSERT INTO content_search_{language} (rowid, kind, object_id, url, title, body) '
+                        'VALUES (%s, %s, %s, %s, %s, %s)',
+                        [_rowid(kind, object_id), kind, object_id, url, title, body],
+                    )
+                else:
+                    cursor.execute(
+                        'INSERT INTO content_search (kind, object_id, language, config, url, title, body) '
+                        'VALUES (%s, %s, %s, %s::regconfig, %s, %s, %s)',
+                        [kind, object_id, language, PG_CONFIGS[language], url, title, body],
+                    )
+
+
+def rebuild():
+    """Reindex every milestone and resource. Returns the number of objects indexed."""
+    from .models import PregnancyMilestone, Resource
+
+    if not supported():
+        return 0
+    count = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                for language in LANGUAGES:
+                    cursor.execute(f'DELETE FROM content_search_{language}')
+            else:
+                cursor.execute('DELETE FROM content_search')
+        for model in (PregnancyMilestone, Resource):
+            for obj in model.objects.iterator():
+                index(obj)
+                count += 1
+    return count
+
+
+def _terms(query):
+    # Only word characters reach the MATCH / tsquery syntax; the last term is a prefix
+    return _TERM_RE.findall(query.lower())[:10]
+
+
+def _snippet(text):
+    return mark_safe(escape(text).replace(_START, '<mark>').replace(_STOP, '</mark>'))
+
+
+def _search_sqlite(terms, language, limit):
+    match = ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+    table = f'content_search_{language}'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT kind, object_id, url, title, '
+            f"snippet({table}, 4, %s, %s, '…', %s), bm25({table}, 0, 0, 0, 10.0, 1.0) AS rank "
+            f'FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s',
+            [_START, _STOP, SNIPPET_WORDS, match, limit],
+        )
+        # bm25 is lower-is-better; flip it so higher is better on both backends
+        return [(kind, object_id, url, title, snippet, -rank) for kind, object_id, url, title, snippet, rank in cursor.fetchall()]
+
+
+def _search_postgresql(terms, language, limit):
+    tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+    options = f'StartSel={_START}, StopSel={_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=2'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT kind, object_id, url, title, ts_headline(config, body, query, %s), ts_rank_cd(document, query) AS rank '
+            'FROM content_search, to_tsquery(%s::regconfig, %s) AS query '
+            'WHERE language = %s AND document @@ query ORDER BY rank DESC LIMIT %s',
+            [options, PG_CONFIGS[language], tsquery, language, limit],
+        )
+        return cursor.fetchall()
+
+
+def search(query, language=DEFAULT_LANGUAGE, limit=RESULT_LIMIT):
+    """
+    Ranked results for ``query`` in ``language`` and, for other languages,
+    English content as well, since not everything is translated.
+    """
+    terms = _terms(query or '')
+    if not terms or not supported():
+        return []
+    backend = _search_sqlite if connection.vendor == 'sqlite' else _search_postgresql
+    languages = dict.fromkeys([language_for(language), DEFAULT_LANGUAGE])
+    rows = [row for code in languages for row in backend(terms, code, limit)]
+    rows.sort(key=lambda row: row[5], reverse=True)
+    return [
+        {'kind': kind, 'object_id': object_id, 'url': url, 'title': title, 'snippet': _snippet(snippet), 'rank': rank}
+        for kind, object_id, url, title, snippet, rank in rows[:limit]
+    ]
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
@@ -30,3 +30,32 @@ def save_user_profile(sender, instance, **kwargs):
     except Exception:
         # Table might not exist during migrations
         pass
+
+@receiver(post_save, sender='pregnancy.PregnancyMilestone')
+@receiver(post_save, sender='pregnancy.Resource')
+def index_search_content(sender, instance, raw=False, **kwargs):
+    """Keep the full-text search documents in step with milestone/resource edits"""
+    if raw:
+        return
+    from . import search
+    search.index(instance)
+
+@receiver(post_delete, sender='pregnancy.PregnancyMilestone')
+@receiver(post_delete, sender='pregnancy.Resource')
+def unindex_search_content(sender, instance, **kwargs):
+    """Drop the search documents of a deleted milestone/resource"""
+    from . import search
+    if search.supported():
+        search.unindex(search.MODEL_KINDS[sender._meta.model_name], instance.pk)
+
+@receiver(post_save, sender='pregnancy.PregnancyMilestoneTranslation')
+@receiver(post_delete, sender='pregnancy.PregnancyMilestoneTranslation')
+def reindex_translated_milestone(sender, instance, raw=False, **kwargs):
+    """Translations are indexed as part of their milestone"""
+    if raw:
+        return
+    from . import search
+    from .models import PregnancyMilestone
+    milestone = PregnancyMilestone.objects.filter(pk=instance.milestone_id).first()
+    if milestone is not None:
+        search.index(milestone)
@@ -0,0 +1,24 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from ..assets import bundle_path, bundle_sources
+
+register = template.Library()
+
+TAGS = {
+    'js': '<script src="{}"></script>',
+    'css': '<link rel="stylesheet" href="{}">',
+}
+
+
+@register.simple_tag
+def bundle(name, kind):
+    """
+    {% bundle 'home' 'js' %} - the built bundle when STATIC_BUNDLES_ENABLED,
+    otherwise one tag per source file so edits show up without a rebuild.
+    """
+    if settings.STATIC_BUNDLES_ENABLED:
+        return format_html(TAGS[kind], static(bundle_path(name, kind)))
+    return format_html_join('\n', TAGS[kind], ((static(source),) for source in bundle_sources(name, kind)))
@@ -13,7 +13,9 @@ urlpatterns = [
     path('dashboard/', views.patient_dashboard, name='patient_dashboard'),
     path('dashboard/', views.patient_dashboard, name='dashboard'),  # ALIAS
     path('clinician/dashboard/', views.clinician_dashboard, name='clinician_dashboard'),
+    path('clinician/alerts/stream/', views.clinician_alert_stream, name='clinician_alert_stream'),
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('analytics/cohorts/', views.cohort_analytics, name='cohort_analytics'),
 
     # Profile URLs
     path('profile/', views.profile_view, name='profile'),
@@ -24,6 +26,8 @@ urlpatterns = [
     path('appointments/create/', views.appointment_create, name='appointment_create'),
     path('appointments/<int:appointment_id>/edit/', views.appointment_edit, name='appointment_edit'),
     path('appointments/<int:appointment_id>/delete/', views.appointment_delete, name='appointment_delete'),
+    path('calendar/token/', views.calendar_feed_token, name='calendar_feed_token'),
+    path('calendar/<str:token>.ics', views.calendar_feed_ics, name='calendar_feed_ics'),
 
     # Health Metrics URLs
     path('health-metrics/', views.health_metrics_list, name='health_metrics_list'),
@@ -38,9 +42,12 @@ urlpatterns = [
 
     # ADDED MISSING URL PATTERNS FOR YOUR TEMPLATES
     path('resources/', views.resources, name='resources'),
+    path('search/', views.content_search, name='content_search'),
     path('baby-development/', views.baby_development, name='baby_development'),
     path('week-tracker/', views.week_tracker, name='week_tracker'),
     path('messaging/', views.messaging, name='messaging'),
+    path('messaging/start/', views.conversation_start, name='conversation_start'),
+    path('messaging/<int:conversation_id>/messages/', views.conversation_messages, name='conversation_messages'),
     
     # ADDED NEW URLS FOR NUTRITION AND EXERCISE
     path('nutrition/', views.nutrition, name='nutrition'),
@@ -52,6 +59,13 @@ urlpatterns = [
     # Clinician-specific URLs
     path('clinician/patients/', views.clinician_patients, name='clinician_patients'),
     path('clinician/patients/<int:patient_id>/', views.clinician_patient_detail, name='clinician_patient_detail'),
+    path('clinician/patients/<int:patient_id>/export/', views.clinician_patient_export, name='clinician_patient_export'),
+    path('clinician/due-calendar/', views.clinician_due_calendar, name='clinician_due_calendar'),
+
+    # FHIR bulk data export (administrators)
+    path('fhir/$export', views.bulk_export_kickoff, name='bulk_export_kickoff'),
+    path('fhir/exports/<int:job_id>/', views.bulk_export_status, name='bulk_export_status'),
+    path('fhir/exports/<int:job_id>/<str:filename>', views.bulk_export_file, name='bulk_export_file'),
 ]
 
 # Custom error handlers
@@ -1,17 +1,13 @@
 # pregnancy/utils.py
 
-from datetime import datetime
+from . import gestation
 
 def calculate_pregnancy_progress(start_date):
     """
     Calculate pregnancy progress (weeks and days) from the start date.
     """
-    if not start_date:
+    data = gestation.week_data(start_date)
+    if not data:
         return {"weeks": 0, "days": 0}
 
-    today = datetime.today().date()
-    delta = today - start_date
-    weeks = delta.days // 7
-    days = delta.days % 7
-
-    return {"weeks": weeks, "days": days}
+    return {"weeks": data["weeks_completed"], "days": data["day"]}
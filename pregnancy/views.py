@@ -1,4 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
@@ -8,15 +10,22 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
 from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
+from asgiref.sync import sync_to_async
 from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import logging
+import os
 
 from .forms import CustomUserCreationForm, CustomAuthenticationForm, UserProfileForm, AppointmentForm, HealthMetricForm
-from .models import UserProfile, User, Appointment, HealthMetric, PregnancyMilestone
+from .models import UserProfile, User, Appointment, BulkExportJob, HealthMetric, Conversation
+from . import alerts, analytics, appointments, archive, audit, bulk_export, calendar_feed, chat, due_calendar, gestation, milestone_catalog, record_export, risk, search
+from .metrics import track_email
+from .async_utils import run_concurrently
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +39,20 @@ def get_user_profile(view_func):
         return view_func(request, profile, *args, **kwargs)
     return wrapper
 
+# Async counterpart of get_user_profile for async views
+def aget_user_profile(view_func):
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        profile = await UserProfile.objects.select_related('user').filter(user=user).afirst()
+        if profile is None:
+            profile = await UserProfile.objects.acreate(user=user)
+        return await view_func(request, profile, *args, **kwargs)
+    return wrapper
+
+async def render_async(request, template_name, context):
+    """Render off the event loop; templates may still touch lazy relations."""
+    return await sync_to_async(render)(request, template_name, context)
+
 def home(request):
     """Home page view"""
     if request.user.is_authenticated:
@@ -116,7 +139,8 @@ def send_activation_email(request, user):
         'activation_link': activation_link, 
         'site_name': current_site.name
     })
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False, html_message=html_message)
+    with track_email('activation'):
+        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False, html_message=html_message)
 
 def activate(request, uidb64, token):
     """Activate user account"""
@@ -162,111 +186,136 @@ def send_welcome_email(request, user):
         'dashboard_url': dashboard_url, 
         'site_name': current_site.name
     })
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False, html_message=html_message)
+    with track_email('welcome'):
+        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False, html_message=html_message)
 
 @login_required
-@get_user_profile
-def patient_dashboard(request, profile):
+@aget_user_profile
+async def patient_dashboard(request, profile):
     """Patient dashboard view"""
     # Pregnancy data
     pregnancy_data = profile.calculate_pregnancy_week()
     current_trimester = profile.get_trimester()
     progress_percentage = profile.get_pregnancy_progress()
     
-    # Upcoming appointments
-    upcoming_appointments = Appointment.objects.filter(
-        user=request.user,
-        date_time__gte=timezone.now(),
-        is_completed=False
-    ).order_by('date_time')[:5]
-    
-    # Recent health metrics
-    recent_metrics = HealthMetric.objects.filter(
-        user=request.user
-    ).order_by('-date')[:5]
-    
-    # Current milestone
-    current_milestone = profile.get_current_milestone()
+    results = await run_concurrently(
+        # Upcoming appointments
+        upcoming_appointments=lambda: list(Appointment.objects.filter(
+            user_id=profile.user_id,
+            date_time__gte=timezone.now(),
+            is_completed=False
+        ).order_by('date_time')[:5]),
+        # Recent health metrics
+        recent_metrics=lambda: list(HealthMetric.objects.filter(
+            user_id=profile.user_id
+        ).order_by('-date')[:5]),
+        # Current milestone
+        current_milestone=profile.get_current_milestone,
+    )
     
     context = {
         'profile': profile,
         'pregnancy_data': pregnancy_data,
         'current_trimester': current_trimester,
         'progress_percentage': progress_percentage,
-        'upcoming_appointments': upcoming_appointments,
-        'recent_metrics': recent_metrics,
-        'current_milestone': current_milestone,
+        **results,
     }
-    return render(request, 'pregnancy/patient_dashboard.html', context)
+    return await render_async(request, 'pregnancy/patient_dashboard.html', context)
+
 
 @login_required
-@get_user_profile
-def clinician_dashboard(request, profile):
+@aget_user_profile
+async def clinician_dashboard(request, profile):
     """Clinician dashboard view"""
     if not profile.is_clinician():
         messages.error(request, 'Access denied. Clinician role required.')
         return redirect('patient_dashboard')
     
-    # Today's appointments
     today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
     today_end = today_start + timedelta(days=1)
-    todays_appointments = Appointment.objects.filter(
-        date_time__range=[today_start, today_end],
-        is_completed=False
-    ).order_by('date_time')
-    
-    # Upcoming appointments
-    upcoming_appointments = Appointment.objects.filter(
-        date_time__gte=timezone.now(),
-        is_completed=False
-    ).exclude(date_time__range=[today_start, today_end]).order_by('date_time')[:10]
-    
-    # Recent patients
-    recent_patients = UserProfile.objects.filter(
-        role=UserProfile.Roles.PATIENT
-    ).order_by('-created_at')[:5]
+    results = await run_concurrently(
+        # Today's appointments
+        todays_appointments=lambda: list(Appointment.objects.filter(
+            date_time__range=[today_start, today_end],
+            is_completed=False
+        ).select_related('user').order_by('date_time')),
+        # Upcoming appointments
+        upcoming_appointments=lambda: list(Appointment.objects.filter(
+            date_time__gte=timezone.now(),
+            is_completed=False
+        ).exclude(date_time__range=[today_start, today_end]).select_related('user').order_by('date_time')[:10]),
+        # Recent patients
+        recent_patients=lambda: list(UserProfile.objects.filter(
+            role=UserProfile.Roles.PATIENT
+        ).select_related('user').order_by('-created_at')[:5]),
+    )
     
     context = {
         'profile': profile,
-        'todays_appointments': todays_appointments,
-        'upcoming_appointments': upcoming_appointments,
-        'recent_patients': recent_patients,
+        **results,
     }
-    return render(request, 'pregnancy/clinician_dashboard.html', context)
+    return await render_async(request, 'pregnancy/clinician_dashboard.html', context)
+
 
 @login_required
-@get_user_profile
-def admin_dashboard(request, profile):
+@aget_user_profile
+async def clinician_alert_stream(request, profile):
+    """Server-sent event stream of new risk flags for clinicians"""
+    if not profile.is_clinician():
+        return JsonResponse({'error': 'Clinician role required.'}, status=403)
+    
+    # EventSource resends the last id it saw when it reconnects
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_event_id)
+    except (TypeError, ValueError):
+        last_id = await alerts.latest_id()
+    
+    response = StreamingHttpResponse(alerts.event_stream(last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@aget_user_profile
+async def admin_dashboard(request, profile):
     """Admin dashboard view"""
     if not profile.is_admin():
         messages.error(request, 'Access denied. Administrator role required.')
         return redirect('patient_dashboard')
     
-    # Statistics
-    total_users = User.objects.count()
-    total_patients = UserProfile.objects.filter(role=UserProfile.Roles.PATIENT).count()
-    total_clinicians = UserProfile.objects.filter(role=UserProfile.Roles.CLINICIAN).count()
-    total_appointments = Appointment.objects.count()
-    upcoming_appointments = Appointment.objects.filter(
-        date_time__gte=timezone.now(),
-        is_completed=False
-    ).count()
-    
-    # Recent activity
-    recent_users = User.objects.order_by('-date_joined')[:5]
-    recent_appointments = Appointment.objects.order_by('-created_at')[:5]
+    results = await run_concurrently(
+        # Statistics
+        total_users=User.objects.count,
+        total_patients=UserProfile.objects.filter(role=UserProfile.Roles.PATIENT).count,
+        total_clinicians=UserProfile.objects.filter(role=UserProfile.Roles.CLINICIAN).count,
+        total_appointments=Appointment.objects.count,
+        upcoming_appointments=Appointment.objects.filter(
+            date_time__gte=timezone.now(),
+            is_completed=False
+        ).count,
+        # Recent activity
+        recent_users=lambda: list(User.objects.order_by('-date_joined')[:5]),
+        recent_appointments=lambda: list(Appointment.objects.select_related('user').order_by('-created_at')[:5]),
+    )
     
     context = {
         'profile': profile,
-        'total_users': total_users,
-        'total_patients': total_patients,
-        'total_clinicians': total_clinicians,
-        'total_appointments': total_appointments,
-        'upcoming_appointments': upcoming_appointments,
-        'recent_users': recent_users,
-        'recent_appointments': recent_appointments,
+        **results,
     }
-    return render(request, 'pregnancy/admin_dashboard.html', context)
+    return await render_async(request, 'pregnancy/admin_dashboard.html', context)
+
+@login_required
+@get_user_profile
+def cohort_analytics(request, profile):
+    """Population cohort report for program managers (JSON, cached per day)"""
+    if not profile.is_admin():
+        return JsonResponse({'error': 'Administrator role required.'}, status=403)
+    
+    report = analytics.cohort_report(refresh=bool(request.GET.get('refresh')))
+    return JsonResponse(report)
+
 
 @login_required
 @get_user_profile
@@ -287,18 +336,35 @@ def profile_view(request, profile):
         'profile': profile,
         'form': form,
     }
+    if profile.calendar_token:
+        context['calendar_feed_url'] = request.build_absolute_uri(reverse('calendar_feed_ics', args=[profile.calendar_token]))
     return render(request, 'pregnancy/profile.html', context)
 
 @login_required
 @get_user_profile
 def appointments_list(request, profile):
-    """List user appointments"""
-    appointments = Appointment.objects.filter(user=request.user).order_by('-date_time')
+    """List user appointments: upcoming and past sections, one page each"""
+    status = request.GET.get('status')
+    if status not in dict(Appointment.STATUS_CHOICES):
+        status = None
+    sections = appointments.sections(
+        request.user, status=status,
+        upcoming_cursor=request.GET.get('upcoming'), past_cursor=request.GET.get('past'),
+    )
     
     context = {
         'profile': profile,
-        'appointments': appointments,
+        'status': status,
+        'upcoming_appointments': sections[appointments.UPCOMING][0],
+        'upcoming_cursor': sections[appointments.UPCOMING][1],
+        'past_appointments': sections[appointments.PAST][0],
+        'past_cursor': sections[appointments.PAST][1],
     }
+    counts = appointments.status_counts(request.user)
+    context['total_count'] = counts['all']
+    context['status_filters'] = [(value, label, counts[value]) for value, label in Appointment.STATUS_CHOICES]
+    if request.GET.get('history'):
+        context['history'], context['history_cursor'] = archive.appointment_history(request.user, request.GET['history'])
     return render(request, 'pregnancy/appointments.html', context)
 
 @login_required
@@ -365,6 +431,39 @@ def appointment_delete(request, profile, appointment_id):
     }
     return render(request, 'pregnancy/appointment_confirm_delete.html', context)
 
+@login_required
+@get_user_profile
+def calendar_feed_token(request, profile):
+    """Create or replace the secret calendar feed URL"""
+    if request.method != 'POST':
+        return redirect('profile')
+    
+    calendar_feed.rotate_token(profile)
+    messages.success(request, 'Your calendar feed link is ready. Any previous link no longer works.')
+    if profile.is_clinician() and not profile.facility:
+        messages.warning(request, 'Set your facility to see its patients\' appointments in the feed.')
+    return redirect('profile')
+
+async def calendar_feed_ics(request, token):
+    """iCalendar feed of appointments, authenticated by the token in the URL"""
+    profile = await UserProfile.objects.select_related('user').filter(calendar_token=token).afirst()
+    if profile is None:
+        raise Http404('No calendar feed matches the given token.')
+    
+    appointments = calendar_feed.feed_appointments(profile)
+    etag = await calendar_feed.etag(appointments)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        name = 'LindaMama Patients' if profile.is_clinician() else 'LindaMama Appointments'
+        response = StreamingHttpResponse(
+            calendar_feed.stream(appointments, name, request.get_host(), clinician=profile.is_clinician()),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="appointments.ics"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 @login_required
 @get_user_profile
 def health_metrics_list(request, profile):
@@ -375,6 +474,9 @@ def health_metrics_list(request, profile):
         'profile': profile,
         'metrics': metrics,
     }
+    # Earlier pregnancies live in the archive tier; only read it when asked
+    if request.GET.get('history'):
+        context['history'], context['history_cursor'] = archive.health_metric_history(request.user, request.GET['history'])
     return render(request, 'pregnancy/health_metrics.html', context)
 
 @login_required
@@ -391,7 +493,12 @@ def health_metric_create(request, profile):
             if HealthMetric.objects.filter(user=request.user, date=metric.date).exists():
                 messages.error(request, 'Health metric for this date already exists.')
             else:
-                metric.save()
+                with transaction.atomic():
+                    metric.save()
+                    # Urgent readings go to the clinician alert feed straight away
+                    flags = risk.score_metric(metric)
+                    if flags:
+                        transaction.on_commit(lambda: alerts.publish_flags(flags))
                 messages.success(request, 'Health metric recorded successfully!')
                 return redirect('health_metrics_list')
         else:
@@ -414,7 +521,11 @@ def health_metric_edit(request, profile, metric_id):
     if request.method == 'POST':
         form = HealthMetricForm(request.POST, instance=metric)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
+                flags = risk.score_metric(metric)
+                if flags:
+                    transaction.on_commit(lambda: alerts.publish_flags(flags))
             messages.success(request, 'Health metric updated successfully!')
             return redirect('health_metrics_list')
         else:
@@ -433,7 +544,7 @@ def health_metric_edit(request, profile, metric_id):
 @get_user_profile
 def pregnancy_milestones(request, profile):
     """Pregnancy milestones view"""
-    milestones = PregnancyMilestone.objects.all()
+    milestones = milestone_catalog.milestones()
     current_milestone = profile.get_current_milestone()
     
     context = {
@@ -447,7 +558,9 @@ def pregnancy_milestones(request, profile):
 @get_user_profile
 def milestone_detail(request, profile, week):
     """Pregnancy milestone detail view"""
-    milestone = get_object_or_404(PregnancyMilestone, week=week)
+    milestone = milestone_catalog.milestone(week)
+    if milestone is None:
+        raise Http404('No milestone for this week.')
     
     context = {
         'profile': profile,
@@ -466,11 +579,23 @@ def resources(request, profile):
     }
     return render(request, 'pregnancy/resources.html', context)
 
+@login_required
+@get_user_profile
+def content_search(request, profile):
+    """Full-text search over milestones and resources"""
+    query = request.GET.get('q', '').strip()
+    context = {
+        'profile': profile,
+        'query': query,
+        'results': search.search(query, language=request.LANGUAGE_CODE) if query else [],
+    }
+    return render(request, 'pregnancy/search.html', context)
+
 @login_required
 @get_user_profile
 def baby_development(request, profile):
     """Baby development information view"""
-    milestones = PregnancyMilestone.objects.all()
+    milestones = milestone_catalog.milestones()
     current_milestone = profile.get_current_milestone()
     
     context = {
@@ -485,7 +610,7 @@ def baby_development(request, profile):
 def week_tracker(request, profile):
     """Week-by-week pregnancy tracker view"""
     pregnancy_data = profile.calculate_pregnancy_week()
-    milestones = PregnancyMilestone.objects.all()
+    milestones = milestone_catalog.milestones()
     current_milestone = profile.get_current_milestone()
     
     context = {
@@ -500,11 +625,59 @@ def week_tracker(request, profile):
 @get_user_profile
 def messaging(request, profile):
     """Messaging view"""
+    entries, next_cursor = chat.inbox_page(request.user, cursor=request.GET.get('cursor'))
+    for entry in entries:
+        entry.other = entry.conversation.other_participant(request.user)
+    
+    # People this user may start a conversation with
+    recipient_role = UserProfile.Roles.PATIENT if profile.is_clinician() else UserProfile.Roles.CLINICIAN
+    recipients = User.objects.filter(userprofile__role=recipient_role, is_active=True).order_by('first_name', 'username')[:200]
+    
     context = {
         'profile': profile,
+        'inbox_entries': entries,
+        'next_cursor': next_cursor,
+        'recipients': recipients,
+        'active_conversation_id': request.GET.get('c'),
     }
     return render(request, 'pregnancy/messaging.html', context)
 
+@login_required
+def conversation_messages(request, conversation_id):
+    """Message history (GET) and HTTP fallback for sending (POST) as JSON"""
+    conversation = get_object_or_404(Conversation, id=conversation_id)
+    if not conversation.has_participant(request.user):
+        return JsonResponse({'error': 'Not found.'}, status=404)
+    
+    if request.method == 'POST':
+        try:
+            message = chat.send_message(conversation, request.user, request.POST.get('body', ''))
+        except (ValueError, PermissionError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'message': message.to_dict()}, status=201)
+    
+    before = request.GET.get('before')
+    history = chat.message_history(conversation, before_id=int(before) if before and before.isdigit() else None)
+    if not before:
+        chat.mark_read(conversation, request.user)
+    return JsonResponse({'messages': [message.to_dict() for message in history]})
+
+@login_required
+def conversation_start(request):
+    """Open (or reuse) a conversation with another user and send the first message"""
+    if request.method != 'POST':
+        return redirect('messaging')
+    
+    other = get_object_or_404(User, id=request.POST.get('recipient') or 0)
+    try:
+        conversation = chat.start_conversation(request.user, other)
+        if request.POST.get('body', '').strip():
+            chat.send_message(conversation, request.user, request.POST['body'])
+    except (ValueError, PermissionError) as e:
+        messages.error(request, str(e))
+        return redirect('messaging')
+    return redirect(f"{reverse('messaging')}?c={conversation.id}")
+
 # ADDED NUTRITION AND EXERCISE VIEWS
 @login_required
 @get_user_profile
@@ -542,7 +715,9 @@ def clinician_patients(request):
         messages.error(request, 'Access denied. Clinician role required.')
         return redirect('patient_dashboard')
     
-    patients = UserProfile.objects.filter(role=UserProfile.Roles.PATIENT).order_by('-created_at')
+    patients = list(UserProfile.objects.filter(role=UserProfile.Roles.PATIENT).select_related('user').order_by('-created_at'))
+    # Week and trimester for every row in one pass
+    gestation.attach(patients)
     
     context = {
         'profile': profile,
@@ -551,24 +726,166 @@ def clinician_patients(request):
     return render(request, 'pregnancy/clinician_patients.html', context)
 
 @login_required
-def clinician_patient_detail(request, patient_id):
+@get_user_profile
+def clinician_due_calendar(request, profile):
+    """Patients due per day over the next 90 days, with a drill-down list"""
+    if not profile.is_clinician():
+        messages.error(request, 'Access denied. Clinician role required.')
+        return redirect('patient_dashboard')
+    
+    facility = request.GET.get('facility') or None
+    days = due_calendar.capacity(facility=facility)
+    
+    context = {
+        'profile': profile,
+        'facility': facility,
+        'facilities': due_calendar.facilities(),
+        'days': days,
+        'total_due': sum(count for _, count in days),
+        'busiest': max(count for _, count in days),
+    }
+    
+    # Drill-down: ?day=YYYY-MM-DD, optionally through ?to=YYYY-MM-DD
+    try:
+        start = date.fromisoformat(request.GET['day'])
+        end = date.fromisoformat(request.GET.get('to') or request.GET['day'])
+    except (KeyError, ValueError):
+        start = end = None
+    if start and end >= start:
+        patients, next_cursor = due_calendar.due_patients_page(
+            start, end, facility=facility, cursor=request.GET.get('cursor'),
+        )
+        gestation.attach(patients)
+        context.update({'range_start': start, 'range_end': end, 'patients': patients, 'next_cursor': next_cursor})
+    return render(request, 'pregnancy/due_calendar.html', context)
+
+@login_required
+@aget_user_profile
+async def clinician_patient_detail(request, profile, patient_id):
     """Clinician's patient detail view"""
-    profile = request.user.userprofile
     if not profile.is_clinician():
         messages.error(request, 'Access denied. Clinician role required.')
         return redirect('patient_dashboard')
     
-    patient_profile = get_object_or_404(UserProfile, id=patient_id, role=UserProfile.Roles.PATIENT)
-    appointments = Appointment.objects.filter(user=patient_profile.user).order_by('-date_time')[:10]
-    health_metrics = HealthMetric.objects.filter(user=patient_profile.user).order_by('-date')[:10]
+    # All three lookups key off the profile id, so none has to wait for another
+    results = await run_concurrently(
+        patient_profile=lambda: UserProfile.objects.select_related('user').filter(
+            id=patient_id, role=UserProfile.Roles.PATIENT
+        ).first(),
+        appointments=lambda: list(Appointment.objects.filter(
+            user__userprofile__id=patient_id
+        ).order_by('-date_time')[:10]),
+        health_metrics=lambda: list(HealthMetric.objects.filter(
+            user__userprofile__id=patient_id
+        ).order_by('-date')[:10]),
+    )
+    if results['patient_profile'] is None:
+        raise Http404('No patient matches the given query.')
+    audit.record_access(request, profile.user, results['patient_profile'].user_id)
     
     context = {
         'profile': profile,
-        'patient_profile': patient_profile,
-        'appointments': appointments,
-        'health_metrics': health_metrics,
+        **results,
     }
-    return render(request, 'pregnancy/clinician_patient_detail.html', context)
+    return await render_async(request, 'pregnancy/clinician_patient_detail.html', context)
+
+@login_required
+@aget_user_profile
+async def clinician_patient_export(request, profile, patient_id):
+    """Stream a patient's whole record, as NDJSON or (?format=zip) a zip bundle"""
+    if not profile.is_clinician():
+        return JsonResponse({'error': 'Clinician role required.'}, status=403)
+    
+    patient = await UserProfile.objects.select_related('user').filter(
+        id=patient_id, role=UserProfile.Roles.PATIENT
+    ).afirst()
+    if patient is None:
+        raise Http404('No patient matches the given query.')
+    audit.record_access(request, profile.user, patient.user_id, action=audit.EXPORT)
+    
+    filename = f"{patient.user.username}-record-{timezone.localdate():%Y%m%d}"
+    if request.GET.get('format') == 'zip':
+        response = StreamingHttpResponse(record_export.zip_bundle(patient), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+    else:
+        response = StreamingHttpResponse(record_export.ndjson(patient), content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    response['Cache-Control'] = 'no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _require_admin(request):
+    profile = getattr(request.user, 'userprofile', None)
+    if profile is None or not profile.is_admin():
+        return JsonResponse({'error': 'Administrator role required.'}, status=403)
+    return None
+
+@login_required
+def bulk_export_kickoff(request):
+    """Start a FHIR bulk data export (``_type`` limits the resource types)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required.'}, status=405)
+    denied = _require_admin(request)
+    if denied:
+        return denied
+    
+    try:
+        types = bulk_export.parse_types(request.POST.get('_type') or request.GET.get('_type'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    job = bulk_export.create_job(request.user, types)
+    response = JsonResponse({'id': job.id, 'status': job.status}, status=202)
+    response['Content-Location'] = request.build_absolute_uri(reverse('bulk_export_status', args=[job.id]))
+    return response
+
+@login_required
+def bulk_export_status(request, job_id):
+    """Progress of a bulk export while it runs; the output manifest once complete"""
+    denied = _require_admin(request)
+    if denied:
+        return denied
+    
+    job = get_object_or_404(BulkExportJob, id=job_id)
+    if job.status == BulkExportJob.Status.FAILED:
+        return JsonResponse({
+            'resourceType': 'OperationOutcome',
+            'issue': [{'severity': 'error', 'code': 'exception', 'diagnostics': job.error}],
+        }, status=500, content_type='application/fhir+json')
+    if job.status != BulkExportJob.Status.COMPLETED:
+        done, total = bulk_export.job_progress(job)
+        response = JsonResponse({'id': job.id, 'status': job.status, 'files_written': done, 'files_planned': total}, status=202)
+        response['X-Progress'] = f'{done}/{total} files written' if total else job.get_status_display()
+        response['Retry-After'] = '30'
+        return response
+    
+    return JsonResponse({
+        'transactionTime': job.started_at,
+        'request': request.build_absolute_uri(f"{reverse('bulk_export_kickoff')}?_type={job.resource_types}"),
+        'requiresAccessToken': True,
+        'output': [
+            {
+                'type': resource_type,
+                'url': request.build_absolute_uri(reverse('bulk_export_file', args=[job.id, filename])),
+                'count': count,
+            }
+            for resource_type, filename, count in bulk_export.outputs(job)
+        ],
+        'error': [],
+    })
+
+@login_required
+def bulk_export_file(request, job_id, filename):
+    """One NDJSON file of a completed bulk export"""
+    denied = _require_admin(request)
+    if denied:
+        return denied
+    
+    job = get_object_or_404(BulkExportJob, id=job_id, status=BulkExportJob.Status.COMPLETED)
+    # Only names from the manifest, so the path cannot leave the job directory
+    path = os.path.join(bulk_export.job_dir(job), filename)
+    if filename not in {name for _, name, _ in bulk_export.outputs(job)} or not os.path.exists(path):
+        raise Http404('Export file no longer available.')
+    return FileResponse(open(path, 'rb'), content_type='application/fhir+ndjson', as_attachment=True, filename=filename)
 
 def handler404(request, exception):
     """Custom 404 error handler"""
@@ -7,10 +7,15 @@ For more information on this file, see:
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
+import logging
 import os
+from importlib.util import find_spec
+
 import django
 from django.core.asgi import get_asgi_application
 
+logger = logging.getLogger(__name__)
+
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pregnancy_tracker.settings')
 
@@ -20,25 +25,24 @@ django.setup()
 # Get the default ASGI application
 application = get_asgi_application()
 
+
+def _installed(module):
+    """Check for an optional package without paying to import it."""
+    try:
+        return find_spec(module) is not None
+    except ModuleNotFoundError:
+        return False
+
+
 # Optional: Add support for Django Channels (for WebSockets/real-time features)
-try:
+if _installed('channels'):
     from channels.routing import ProtocolTypeRouter, URLRouter
     from channels.auth import AuthMiddlewareStack
     from channels.security.websocket import AllowedHostsOriginValidator
-    
-    # Import your WebSocket routing if using Channels
-    from apps.messaging import routing as messaging_routing
-    from apps.pregnancy import routing as pregnancy_routing
-    
-    # Define WebSocket URL patterns
-    websocket_urlpatterns = []
-    
-    # Add messaging WebSocket routes
-    websocket_urlpatterns += messaging_routing.websocket_urlpatterns
-    
-    # Add pregnancy tracking WebSocket routes
-    websocket_urlpatterns += pregnancy_routing.websocket_urlpatterns
-    
+
+    # Messaging WebSocket routes
+    from pregnancy.routing import websocket_urlpatterns
+
     # Create the ASGI application with WebSocket support
     application = ProtocolTypeRouter({
         "http": application,
@@ -48,29 +52,19 @@ try:
             )
         ),
     })
-    
-except ImportError:
-    # Channels is not installed, use standard ASGI application
-    print("Django Channels not installed. Running without WebSocket support.")
-    pass
+else:
+    logger.debug("Django Channels not installed; serving HTTP only.")
 
 # Optional: Add additional ASGI middleware for production
-try:
+if _installed('asgi_correlation_id'):
     from asgi_correlation_id import CorrelationIdMiddleware
     application = CorrelationIdMiddleware(application)
-except ImportError:
-    # Correlation ID middleware not installed
-    pass
 
 # Optional: Add security headers middleware
-try:
+if _installed('asgi_headers'):
     from asgi_headers import SecurityHeadersMiddleware
     application = SecurityHeadersMiddleware(application, {
         'X-Frame-Options': 'DENY',
         'X-Content-Type-Options': 'nosniff',
         'X-XSS-Protection': '1; mode=block',
     })
-except ImportError:
-    # Security headers middleware not installed
-    pass
-
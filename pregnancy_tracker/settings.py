@@ -22,6 +22,10 @@ sys.path.insert(0, os.path.join(BASE_DIR, 'apps'))
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-change-this-in-production-!')
 DEBUG = config('DEBUG', default=True, cast=bool)
 
+# Fast cold-start mode for scale-to-zero hosting: skip optional apps that no
+# URL uses yet and start-up work that build.sh already does.
+FAST_STARTUP = config('FAST_STARTUP', default=False, cast=bool)
+
 # Allow all hosts in development, specific in production
 if DEBUG:
     ALLOWED_HOSTS = ['*']
@@ -55,10 +59,20 @@ INSTALLED_APPS = [
     'pregnancy.apps.PregnancyConfig',
 ]
 
+# No routes use the REST API or social login yet; in fast start-up mode they
+# are left out and only imported by code that actually needs them.
+OPTIONAL_APPS = ['rest_framework', 'django_filters', 'allauth.socialaccount']
+if FAST_STARTUP:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in OPTIONAL_APPS]
+
 # ---------------------------------------------------------------------
 # MIDDLEWARE
 # ---------------------------------------------------------------------
 MIDDLEWARE = [
+    'pregnancy.middleware.RequestIdMiddleware',  # Correlation ID for logs
+    'pregnancy.middleware.MetricsMiddleware',  # Prometheus request/DB metrics
+    'pregnancy.middleware.ReplicaPinningMiddleware',  # Read-your-writes on replicas
+    'pregnancy.middleware.RateLimitMiddleware',  # Token buckets per URL name, before CSRF/auth
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -95,6 +109,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'pregnancy.context_processors.app_settings',  # Custom context processor
+                'pregnancy.context_processors.unread_messages',
             ],
             'builtins': [
                 'crispy_forms.templatetags.crispy_forms_tags',
@@ -107,23 +122,85 @@ TEMPLATES = [
 # ---------------------------------------------------------------------
 # DATABASE
 # ---------------------------------------------------------------------
-# Default: SQLite (for local development)
+# Default: SQLite (for local development and small clinic deployments)
+# SQLITE_TUNED applies WAL journaling (readers never block the writer),
+# synchronous=NORMAL (safe under WAL), memory-mapped reads, a busy timeout
+# and BEGIN IMMEDIATE so writers queue for the lock instead of failing with
+# "database is locked". Compare with `manage.py benchmark_sqlite`.
+# Off by default because the development db.sqlite3 is committed and WAL
+# mode is written into the file itself; turn it on for deployments that
+# serve from SQLite.
+SQLITE_TUNED = config('SQLITE_TUNED', default=False, cast=bool)
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int)};"
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=int),  # seconds
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS if SQLITE_TUNED else {},
     }
 }
 
 # Use PostgreSQL in production (Render)
+# With DB_POOL_ENABLED each worker process keeps a small psycopg pool instead
+# of one persistent connection per thread, so total connections stay at
+# workers x DB_POOL_MAX_SIZE however many threads serve requests. Pooled
+# connections are checked before being handed out and recycled after
+# DB_POOL_MAX_LIFETIME, so a failover costs a reconnect rather than a 500.
+# Sizing rule: a request holds one connection for its thread and
+# pregnancy.async_utils.run_concurrently borrows more for its parallel
+# queries (admin_dashboard fans out to 7), capped at DB_POOL_MAX_SIZE - 1.
+# The default of 8 lets the widest page run fully in parallel; a smaller
+# pool still works but runs those queries in waves.
+DB_POOL_ENABLED = config('DB_POOL_ENABLED', default=True, cast=bool)
+
 if not DEBUG:
     DATABASE_URL = config('DATABASE_URL', default='')
     if DATABASE_URL:
         DATABASES['default'] = dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            conn_max_age=0 if DB_POOL_ENABLED else 600,  # pooling replaces persistent connections
+            conn_health_checks=True,  # with pooling: checked on every checkout
             ssl_require=True
         )
+        if DB_POOL_ENABLED:
+            DATABASES['default']['OPTIONS']['pool'] = {
+                'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=8, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),  # max wait for a connection
+                'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800.0, cast=float),
+                'max_idle': config('DB_POOL_MAX_IDLE', default=300.0, cast=float),
+            }
+
+# Read replicas: comma-separated URLs become aliases replica1, replica2, ...
+# Reads are spread across them by pregnancy.db_routers; a client that has
+# just written reads from the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICA_URLS = [url for url in config('DATABASE_REPLICA_URLS', default='').split(',') if url.strip()]
+DATABASE_REPLICAS = []
+for number, url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    alias = f'replica{number}'
+    replica = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=DATABASES['default'].get('CONN_MAX_AGE', 0),
+        conn_health_checks=True,
+    )
+    if replica['ENGINE'] == DATABASES['default']['ENGINE']:
+        replica['OPTIONS'] = {**DATABASES['default'].get('OPTIONS', {}), **replica.get('OPTIONS', {})}
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[alias] = replica
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['pregnancy.db_routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
 
 # ---------------------------------------------------------------------
 # AUTHENTICATION
@@ -167,23 +244,54 @@ LANGUAGES = [
 ]
 LOCALE_PATHS = [BASE_DIR / 'locale']
 
+# Per-language milestone JSON written by `manage.py compile_milestone_catalog`
+# at deploy time and loaded once per process
+MILESTONE_CATALOG_DIR = BASE_DIR / 'build' / 'catalog'
+
 # ---------------------------------------------------------------------
 # STATIC & MEDIA FILES
 # ---------------------------------------------------------------------
 STATIC_URL = '/static/'
+# Output of `manage.py build_assets`; collected like any other static dir
+STATIC_BUNDLE_DIR = BASE_DIR / 'build' / 'static'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
     BASE_DIR / 'pregnancy' / 'static',
+    STATIC_BUNDLE_DIR,
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise configuration: content-hashed names, gzip + Brotli variants,
+# and far-future immutable caching for every hashed file
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 WHITENOISE_MANIFEST_STRICT = False  # Allow missing files in development
 
+# Per-page bundles: {% bundle 'name' 'js' %} serves one minified file when
+# STATIC_BUNDLES_ENABLED, otherwise the individual sources in this order.
+STATIC_BUNDLES = {
+    'home': {
+        'js': [
+            'js/utils.js',
+            'js/auth.js',
+            'js/navigation.js',
+            'js/actions.js',
+            'js/dashboard.js',
+            'js/main.js',
+        ],
+    },
+}
+STATIC_BUNDLES_ENABLED = config('STATIC_BUNDLES_ENABLED', default=not DEBUG, cast=bool)
+
 # ---------------------------------------------------------------------
 # LOGIN/LOGOUT REDIRECTS
 # ---------------------------------------------------------------------
@@ -303,14 +411,29 @@ CSRF_TRUSTED_ORIGINS = [
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Request threads only enqueue records; one writer thread per process
+# formats them and appends to the shared files in batches (see
+# pregnancy/logging_handlers.py). Files are JSON lines unless LOG_FORMAT=text.
+LOG_FORMAT = config('LOG_FORMAT', default='json')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'pregnancy.logging_handlers.RequestIdFilter',
+        },
+    },
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} [{request_id}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'pythonjsonlogger.json.JsonFormatter',
+            'fmt': '%(asctime)s %(levelname)s %(name)s %(module)s %(process)d %(thread)d %(request_id)s %(message)s',
+            'rename_fields': {'levelname': 'level', 'asctime': 'time'},
+        },
         'simple': {
             'format': '{levelname} {message}',
             'style': '{',
@@ -319,11 +442,12 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'pregnancy.logging_handlers.QueuedRotatingFileHandler',
             'filename': LOGS_DIR / 'django.log',
             'maxBytes': 1024 * 1024 * 5,  # 5MB
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['request_id'],
         },
         'console': {
             'level': 'DEBUG' if DEBUG else 'INFO',
@@ -332,11 +456,12 @@ LOGGING = {
         },
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'pregnancy.logging_handlers.QueuedRotatingFileHandler',
             'filename': LOGS_DIR / 'errors.log',
             'maxBytes': 1024 * 1024 * 5,
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['request_id'],
         },
     },
     'root': {
@@ -384,7 +509,7 @@ if not DEBUG:
     # Production caching with Redis
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'BACKEND': 'pregnancy.cache.InstrumentedRedisCache',
             'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/0'),
             'OPTIONS': {
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -395,7 +520,7 @@ else:
     # Development caching
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'BACKEND': 'pregnancy.cache.InstrumentedLocMemCache',
             'LOCATION': 'unique-snowflake',
         }
     }
@@ -403,6 +528,37 @@ else:
 # Cache timeout in seconds
 CACHE_MIDDLEWARE_SECONDS = 300  # 5 minutes
 
+# ---------------------------------------------------------------------
+# CHANNEL LAYER (real-time messaging)
+# ---------------------------------------------------------------------
+# The in-memory layer only reaches sockets in the same process: with more
+# than one gunicorn worker (WEB_CONCURRENCY > 1), participants on different
+# workers never see each other's messages, and the system check
+# pregnancy.W001 says so. Set CHANNEL_LAYER_URL to a Redis server
+# (redis://127.0.0.1:6379/1) to share groups between workers and hosts.
+CHANNEL_LAYER_URL = config('CHANNEL_LAYER_URL', default='')
+if CHANNEL_LAYER_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_LAYER_URL], 'capacity': 1000},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'CONFIG': {'capacity': 1000, 'expiry': 60},
+        }
+    }
+
+# ---------------------------------------------------------------------
+# METRICS (Prometheus)
+# ---------------------------------------------------------------------
+# /metrics is open in DEBUG, to staff users, and to these scraper addresses.
+# Multi-worker aggregation is configured in gunicorn.conf.py.
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1').split(',')
+
 # ---------------------------------------------------------------------
 # TESTING CONFIGURATION
 # ---------------------------------------------------------------------
@@ -414,25 +570,55 @@ TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # ---------------------------------------------------------------------
-# AUTO MIGRATION FIX FOR RENDER (SOLUTION FOR MISSING TABLES)
+# ARCHIVING (manage.py archive_records)
 # ---------------------------------------------------------------------
-import os
-from django.core.management import call_command
-
-def run_migrations():
-    """Run migrations automatically on startup"""
-    try:
-        print("Running auto-migrations for missing tables...")
-        call_command('migrate', verbosity=0)
-        call_command('migrate', 'account', verbosity=0)
-        call_command('migrate', 'pregnancy', verbosity=0)
-        print("Auto-migrations completed successfully!")
-    except Exception as e:
-        print(f"Auto-migration completed with notes: {e}")
-
-# Run migrations when app starts (works on Render free tier)
-if os.environ.get('RENDER') or not DEBUG:
-    run_migrations()
-else:
-    # Also run in development if needed
-    run_migrations()
+ARCHIVE_POSTPARTUM_DAYS = config('ARCHIVE_POSTPARTUM_DAYS', default=120, cast=int)
+ARCHIVE_APPOINTMENTS_AFTER_DAYS = config('ARCHIVE_APPOINTMENTS_AFTER_DAYS', default=180, cast=int)
+
+# ---------------------------------------------------------------------
+# BULK EXPORT (manage.py run_bulk_exports)
+# ---------------------------------------------------------------------
+# FHIR NDJSON files, one directory per job
+BULK_EXPORT_DIR = config('BULK_EXPORT_DIR', default=str(BASE_DIR / 'exports'))
+BULK_EXPORT_PARTITION_SIZE = config('BULK_EXPORT_PARTITION_SIZE', default=100_000, cast=int)
+
+# ---------------------------------------------------------------------
+# RATE LIMITING (pregnancy.ratelimit)
+# ---------------------------------------------------------------------
+# 'local' keeps buckets in each worker's memory; 'cache' shares them
+# through RATE_LIMIT_CACHE across workers and hosts.
+RATE_LIMIT_STORE = config('RATE_LIMIT_STORE', default='local')
+RATE_LIMIT_CACHE = 'default'
+# Reverse proxies in front of the app (Render's router is one). With 0 the
+# client is REMOTE_ADDR; behind a proxy that would be one shared IP bucket
+# for everybody. Otherwise the client is the X-Forwarded-For entry added by
+# the outermost trusted proxy.
+RATE_LIMIT_PROXY_COUNT = config('RATE_LIMIT_PROXY_COUNT', default=0, cast=int)
+RATE_LIMITS = {
+    'login': {'methods': ['POST'], 'ip': '20/min', 'account': '5/5min', 'account_field': 'username'},
+    'admin:login': {'methods': ['POST'], 'ip': '10/min', 'account': '5/5min', 'account_field': 'username'},
+    # The signup view is served at both /signup/ and /register/; one set of buckets
+    ('register', 'signup'): {'methods': ['POST'], 'ip': '5/10min', 'account': '3/h', 'account_field': 'email'},
+    'activate': {'ip': '10/min', 'account': '5/h', 'account_kwarg': 'uidb64'},
+    'calendar_feed_ics': {'ip': '30/min'},
+    'content_search': {'ip': '60/min'},
+    'conversation_messages': {'ip': '120/min'},
+    'bulk_export_kickoff': {'ip': '5/h'},
+}
+
+# ---------------------------------------------------------------------
+# AUDIT (pregnancy.audit)
+# ---------------------------------------------------------------------
+# Record access events are buffered per process and written together every
+# AUDIT_FLUSH_SECONDS, or sooner once AUDIT_BUFFER_SIZE are waiting.
+AUDIT_BUFFER_SIZE = config('AUDIT_BUFFER_SIZE', default=200, cast=int)
+AUDIT_FLUSH_SECONDS = config('AUDIT_FLUSH_SECONDS', default=5.0, cast=float)
+
+# ---------------------------------------------------------------------
+# STARTUP
+# ---------------------------------------------------------------------
+# Migrations run in build.sh before the web process starts. Calling
+# ``migrate`` from this module cannot work (the app registry is not loaded
+# yet) and it cached an incomplete management command list.
+# Measure startup with: python manage.py profile_startup [--fast]
+STARTUP_TARGET_SECONDS = config('STARTUP_TARGET_SECONDS', default=2.0, cast=float)
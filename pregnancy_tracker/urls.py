@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 from pregnancy import views
+from pregnancy.metrics import metrics_view
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', views.home, name='home'),
     
     # Authentication URLs
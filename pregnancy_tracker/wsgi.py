@@ -8,21 +8,24 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 """
 
 import os
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pregnancy_tracker.settings')
 
 # RUN MIGRATIONS BEFORE STARTING APPLICATION
-try:
-    from django.core.management import call_command
-    print("Running database migrations...")
-    call_command('migrate', verbosity=1)
-    call_command('migrate', 'account', verbosity=1)
-    call_command('migrate', 'pregnancy', verbosity=1)
-    print("All migrations completed successfully!")
-except Exception as e:
-    print(f"Migration completed with notes: {e}")
+# Skipped in fast start-up mode: build.sh has already migrated the database.
+if not settings.FAST_STARTUP:
+    try:
+        from django.core.management import call_command
+        print("Running database migrations...")
+        call_command('migrate', verbosity=1)
+        call_command('migrate', 'account', verbosity=1)
+        call_command('migrate', 'pregnancy', verbosity=1)
+        print("All migrations completed successfully!")
+    except Exception as e:
+        print(f"Migration completed with notes: {e}")
 
 # Get the WSGI application
 application = get_wsgi_application()